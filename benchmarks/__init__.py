@@ -0,0 +1,55 @@
+"""
+Benchmarks for the chart parser, run from the repository root, e.g.
+
+    python -m benchmarks.agenda
+"""
+from compiled_grammar import load_grammar
+from tokenizer import Tokenizer
+
+QUESTION_GRAMMAR = './grammar.fcfg'
+SAMPLE_GRAMMAR = './p1_grammar.cfg'
+SAMPLES = './output/samples.txt'
+
+# The questions answered by main.py
+QUERIES = [
+    'đi từ Hồ Chí Minh tới Nha Trang hết bao lâu',
+    'đi từ Hồ Chí Minh tới Đà Nẵng hết bao lâu',
+    'có bao nhiêu tour đi Phú Quốc vậy bạn',
+    'tour Nha Trang đi bằng phương tiện gì vậy',
+    'đi Nha Trang có những ngày nào nhỉ',
+    'em có thể nhắc lại tất cả các tour được không'
+]
+
+
+def load_question_grammar():
+    return load_grammar(QUESTION_GRAMMAR).grammar
+
+
+def load_sample_grammar():
+    # The plain CFG is read as a feature grammar so that it can be used
+    # by ``custom_parser.Parser``.
+    return load_grammar(SAMPLE_GRAMMAR, format='fcfg').grammar
+
+
+def question_corpus():
+    """
+    Return the tokenized questions of main.py
+    """
+    tokenizer = Tokenizer.from_grammar(load_question_grammar())
+    return [tokenizer.tokenize(query) for query in QUERIES]
+
+
+def sample_corpus(grammar, filename=SAMPLES, limit=None):
+    """
+    Return the tokenized sentences of a generated corpus
+    """
+    tokenizer = Tokenizer.from_grammar(grammar)
+    corpus = []
+    with open(filename, "r", encoding="utf-8") as file:
+        for line in file:
+            if limit is not None and len(corpus) >= limit:
+                break
+            tokens = tokenizer.tokenize(line)
+            if tokens:
+                corpus.append(tokens)
+    return corpus
@@ -0,0 +1,83 @@
+"""
+Compare the agenda-based ``Parser.chart_parse`` with the fixed-point loop:
+edges examined by the inference rules and wall time per sentence.
+
+    python -m benchmarks.agenda [--limit N]
+"""
+import argparse
+import time
+
+from custom_parser import Parser, BU_LC_FEATURE_STRATEGY
+from benchmarks import load_question_grammar, load_sample_grammar, question_corpus, sample_corpus
+
+
+class CountingRule:
+    """
+    Wrap a chart rule and count how many edges it is applied to.
+    """
+
+    def __init__(self, rule):
+        self._rule = rule
+        self.NUM_EDGES = rule.NUM_EDGES
+        self.examined = 0
+
+    def apply(self, chart, grammar, *edges):
+        self.examined += len(edges)
+        return self._rule.apply(chart, grammar, *edges)
+
+    def apply_everywhere(self, chart, grammar):
+        if self.NUM_EDGES == 0:
+            yield from self.apply(chart, grammar)
+        else:
+            for edge in chart:
+                yield from self.apply(chart, grammar, edge)
+
+    def __str__(self):
+        return str(self._rule)
+
+
+def run(grammar, corpus, use_agenda):
+    strategy = [CountingRule(rule) for rule in BU_LC_FEATURE_STRATEGY]
+    parser = Parser(grammar, strategy=strategy, use_agenda=use_agenda)
+
+    edges = 0
+    elapsed = 0.0
+    for tokens in corpus:
+        start = time.perf_counter()
+        chart = parser.chart_parse(tokens)
+        elapsed += time.perf_counter() - start
+        edges += chart.num_edges()
+
+    return {
+        "examined": sum(rule.examined for rule in strategy),
+        "edges": edges,
+        "seconds": elapsed,
+    }
+
+
+def report(name, grammar, corpus):
+    n = len(corpus)
+    print(f"{name}: {n} sentences")
+    print(f"{'mode':<12}{'examined/sent':>16}{'edges/sent':>14}{'ms/sent':>12}")
+    results = {}
+    for mode, use_agenda in (("fixed-point", False), ("agenda", True)):
+        res = results[mode] = run(grammar, corpus, use_agenda)
+        print(f"{mode:<12}{res['examined'] / n:>16.1f}{res['edges'] / n:>14.1f}"
+              f"{1000 * res['seconds'] / n:>12.3f}")
+    print(f"speed up: {results['fixed-point']['seconds'] / results['agenda']['seconds']:.2f}x\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="number of sentences of output/samples.txt to parse")
+    args = arg_parser.parse_args()
+
+    report("main.py queries", load_question_grammar(), question_corpus())
+
+    grammar = load_sample_grammar()
+    report("output/samples.txt", grammar, sample_corpus(grammar, limit=args.limit))
+
+
+if __name__ == '__main__':
+    main()
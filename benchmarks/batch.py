@@ -0,0 +1,48 @@
+"""
+Throughput of ``Parser.parse_batch`` on output/samples.txt for an
+increasing number of worker processes.
+
+    python -m benchmarks.batch [--workers 1 2 4 8] [--limit N]
+"""
+import argparse
+import os
+
+from custom_parser import Parser
+from benchmarks import load_sample_grammar, sample_corpus
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=None,
+                            help="numbers of workers to try (default: 1, 2, 4, ... cpu count)")
+    arg_parser.add_argument("--chunksize", type=int, default=64)
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="number of sentences of output/samples.txt to parse")
+    args = arg_parser.parse_args()
+
+    workers = args.workers
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [1]
+        while workers[-1] * 2 <= cpus:
+            workers.append(workers[-1] * 2)
+        if workers[-1] != cpus:
+            workers.append(cpus)
+
+    grammar = load_sample_grammar()
+    corpus = sample_corpus(grammar, limit=args.limit)
+    parser = Parser(grammar)
+
+    print(f"output/samples.txt: {len(corpus)} sentences, {os.cpu_count()} cpus")
+    print(f"{'workers':>8}{'seconds':>10}{'sent/s':>10}{'scaling':>9}")
+    base = None
+    for count in workers:
+        results = parser.parse_batch(corpus, workers=count, chunksize=args.chunksize)
+        if base is None:
+            base = results.throughput()
+        print(f"{results.workers:>8}{results.seconds:>10.2f}{results.throughput():>10.1f}"
+              f"{results.throughput() / base:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare CKY recognition and parsing of p1_grammar.cfg with the chart
+parsers, on output/samples.txt. ``recognize_many`` is timed on the whole
+corpus at once, the other modes sentence by sentence.
+
+    python -m benchmarks.cky [--limit N]
+"""
+import argparse
+import time
+
+from nltk import ChartParser
+
+from cky import CKYParser
+from compiled_grammar import load_grammar
+from custom_parser import Parser
+from benchmarks import SAMPLE_GRAMMAR, sample_corpus
+
+
+def timed(function, corpus):
+    start = time.perf_counter()
+    for tokens in corpus:
+        function(tokens)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="maximum number of sentences of output/samples.txt")
+    args = arg_parser.parse_args()
+
+    cfg = load_grammar(SAMPLE_GRAMMAR)
+    corpus = sample_corpus(cfg.grammar, limit=args.limit)
+    cky = CKYParser(cfg)
+    parser = Parser(load_grammar(SAMPLE_GRAMMAR, format="fcfg"))
+    chart_parser = ChartParser(cfg.grammar)
+
+    modes = [
+        ("CKYParser.recognize_many", None),
+        ("CKYParser.recognize", cky.recognize),
+        ("CKYParser.parse (1 tree)", lambda tokens: next(cky.parse(tokens), None)),
+        ("Parser.parse (1 tree)", lambda tokens: next(parser.parse(tokens), None)),
+        ("Parser.chart_parse", parser.chart_parse),
+        ("nltk ChartParser.chart_parse", chart_parser.chart_parse),
+    ]
+    print(f"{len(corpus)} sentences")
+    print(f"{'mode':<30}{'seconds':>10}{'us/sent':>10}{'sent/s':>11}{'speed up':>10}")
+    baseline = None
+    for name, function in reversed(modes):
+        if function is None:
+            start = time.perf_counter()
+            accepted = cky.recognize_many(corpus)
+            seconds = time.perf_counter() - start
+            assert accepted == [cky.recognize(tokens) for tokens in corpus]
+        else:
+            seconds = timed(function, corpus)
+        if baseline is None:
+            baseline = seconds
+        print(f"{name:<30}{seconds:>10.3f}{1e6 * seconds / len(corpus):>10.1f}"
+              f"{len(corpus) / seconds:>11.0f}{baseline / seconds:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the cost of a keystroke when the tokens of a sentence are given
+one at a time: ``IncrementalParse.push`` against a ``chart_parse`` of the
+whole prefix, by prefix length.
+
+    python -m benchmarks.incremental [--limit N]
+"""
+import argparse
+import time
+
+from custom_parser import Parser
+from benchmarks import load_question_grammar, load_sample_grammar, question_corpus, sample_corpus
+
+
+def run(parser, corpus):
+    """
+    Return prefix length -> [number of prefixes, incremental seconds,
+    reparse seconds, new edges, reparse edges].
+    """
+    by_length = {}
+    for tokens in corpus:
+        incremental = parser.incremental_parse()
+        for length, token in enumerate(tokens, 1):
+            num_edges = incremental.chart().num_edges()
+            start = time.perf_counter()
+            incremental.push(token)
+            middle = time.perf_counter()
+            chart = parser.chart_parse(tokens[:length])
+            end = time.perf_counter()
+
+            row = by_length.setdefault(length, [0, 0.0, 0.0, 0, 0])
+            row[0] += 1
+            row[1] += middle - start
+            row[2] += end - middle
+            row[3] += incremental.chart().num_edges() - num_edges
+            row[4] += chart.num_edges()
+    return by_length
+
+
+def report(name, grammar, corpus):
+    by_length = run(Parser(grammar), corpus)
+    print(f"{name}: {len(corpus)} sentences")
+    print(f"{'length':>6}{'prefixes':>10}{'push us':>10}{'reparse us':>12}"
+          f"{'new edges':>11}{'edges':>8}{'speed up':>10}")
+    totals = [0, 0.0, 0.0, 0, 0]
+    for length in sorted(by_length):
+        row = by_length[length]
+        totals = [total + value for total, value in zip(totals, row)]
+        n = row[0]
+        print(f"{length:>6}{n:>10}{1e6 * row[1] / n:>10.1f}{1e6 * row[2] / n:>12.1f}"
+              f"{row[3] / n:>11.1f}{row[4] / n:>8.1f}{row[2] / row[1]:>9.1f}x")
+    n = totals[0]
+    print(f"{'all':>6}{n:>10}{1e6 * totals[1] / n:>10.1f}{1e6 * totals[2] / n:>12.1f}"
+          f"{totals[3] / n:>11.1f}{totals[4] / n:>8.1f}{totals[2] / totals[1]:>9.1f}x\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="number of sentences of output/samples.txt to parse")
+    args = arg_parser.parse_args()
+
+    report("main.py queries", load_question_grammar(), question_corpus())
+
+    grammar = load_sample_grammar()
+    report("output/samples.txt", grammar, sample_corpus(grammar, limit=args.limit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure the left-corner filter of ``Parser``: edges in the chart,
+predictions pruned and time per sentence, on the main.py queries and on
+the longest sentences of output/samples.txt.
+
+    python -m benchmarks.leftcorner [--longest N]
+"""
+import argparse
+import time
+
+from compiled_grammar import load_grammar
+from custom_parser import Parser
+from benchmarks import QUESTION_GRAMMAR, SAMPLE_GRAMMAR, question_corpus, sample_corpus
+
+
+def run(parser, corpus):
+    edges = pruned = trees = 0
+    elapsed = 0.0
+    for tokens in corpus:
+        start = time.perf_counter()
+        chart = parser.chart_parse(tokens)
+        elapsed += time.perf_counter() - start
+        edges += chart.num_edges()
+        pruned += chart.num_pruned()
+        trees += len(list(chart.parses(parser.grammar().start())))
+    return {"edges": edges, "pruned": pruned, "trees": trees, "seconds": elapsed}
+
+
+def report(name, compiled, corpus):
+    n = len(corpus)
+    print(f"{name}: {n} sentences, {sum(map(len, corpus)) / n:.1f} tokens on average")
+    print(f"{'mode':<12}{'edges/sent':>12}{'pruned/sent':>13}{'trees':>8}{'ms/sent':>10}")
+    results = {}
+    for mode, left_corner_filter in (("unfiltered", False), ("filtered", True)):
+        parser = Parser(compiled, left_corner_filter=left_corner_filter)
+        res = results[mode] = run(parser, corpus)
+        print(f"{mode:<12}{res['edges'] / n:>12.1f}{res['pruned'] / n:>13.1f}{res['trees']:>8}"
+              f"{1000 * res['seconds'] / n:>10.3f}")
+    if results["unfiltered"]["trees"] != results["filtered"]["trees"]:
+        print("WARNING: the filter changed the number of parse trees")
+    print(f"speed up: {results['unfiltered']['seconds'] / results['filtered']['seconds']:.2f}x\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--longest", type=int, default=500,
+                            help="number of the longest sentences of output/samples.txt to parse")
+    args = arg_parser.parse_args()
+
+    report("main.py queries", load_grammar(QUESTION_GRAMMAR), question_corpus())
+
+    compiled = load_grammar(SAMPLE_GRAMMAR, format="fcfg")
+    corpus = sorted(sample_corpus(compiled.grammar), key=len, reverse=True)[:args.longest]
+    report("output/samples.txt (longest)", compiled, corpus)
+
+
+if __name__ == '__main__':
+    main()
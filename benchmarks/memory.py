@@ -0,0 +1,59 @@
+"""
+Compare the memory held by ``FeatureChart`` and ``InternedFeatureChart``
+after parsing a 30-token question.
+
+    python -m benchmarks.memory
+"""
+import gc
+import time
+import tracemalloc
+
+from custom_chart import FeatureChart, InternedFeatureChart
+from custom_parser import Parser
+from benchmarks import load_question_grammar
+
+PLACES = ['Nha_Trang', 'Đà_Nẵng', 'Phú_Quốc', 'Hồ_Chí_Minh']
+
+
+def long_question(length=30):
+    """
+    'đi từ Hồ_Chí_Minh tới Nha_Trang tới Đà_Nẵng ... hết bao_lâu'
+    with ``length`` tokens
+    """
+    tokens = ['đi', 'từ', 'Hồ_Chí_Minh']
+    idx = 0
+    while len(tokens) < length - 2:
+        tokens += ['tới', PLACES[idx % len(PLACES)]]
+        idx += 1
+    tokens = tokens[:length - 2]
+    if tokens[-1] == 'tới':
+        tokens[-1] = 'đi'
+    return tokens + ['hết', 'bao_lâu']
+
+
+def measure(grammar, tokens, chart_class):
+    parser = Parser(grammar, chart_class=chart_class)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    chart = parser.chart_parse(tokens)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chart.num_edges(), current, peak, elapsed
+
+
+def main():
+    grammar = load_question_grammar()
+    tokens = long_question()
+    print(f"{len(tokens)} tokens: {' '.join(tokens)}")
+    print(f"{'chart':<22}{'edges':>8}{'held KiB':>11}{'peak KiB':>11}{'seconds':>10}")
+    for chart_class in (FeatureChart, InternedFeatureChart):
+        edges, current, peak, elapsed = measure(grammar, tokens, chart_class)
+        print(f"{chart_class.__name__:<22}{edges:>8}{current / 1024:>11.1f}{peak / 1024:>11.1f}"
+              f"{elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
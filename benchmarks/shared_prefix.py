@@ -0,0 +1,42 @@
+"""
+Compare ``Parser.parse_batch`` with and without ``shared_prefixes`` on
+output/samples.txt: time, throughput, and the edges of the charts which
+were shared between sentences instead of being computed again.
+
+    python -m benchmarks.shared_prefix [--workers N] [--limit N]
+"""
+import argparse
+
+from custom_parser import Parser
+from benchmarks import load_sample_grammar, sample_corpus
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument("--chunksize", type=int, default=512,
+                            help="sentences sent at once to a worker")
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="number of sentences of output/samples.txt to parse")
+    args = arg_parser.parse_args()
+
+    grammar = load_sample_grammar()
+    corpus = sample_corpus(grammar, limit=args.limit)
+
+    print(f"output/samples.txt: {len(corpus)} sentences, {args.workers} workers")
+    print(f"{'parser':<14}{'mode':<16}{'seconds':>9}{'sent/s':>9}{'edges':>9}"
+          f"{'computed':>10}{'shared':>8}{'speed up':>10}")
+    for name, options in (("custom", {}), ("custom_lc", {"left_corner_filter": True})):
+        parser = Parser(grammar, **options)
+        base = parser.parse_batch(corpus, workers=args.workers, chunksize=args.chunksize)
+        shared = parser.parse_batch(corpus, workers=args.workers, chunksize=args.chunksize,
+                                    shared_prefixes=True)
+        assert [len(trees or ()) for trees in base] == [len(trees or ()) for trees in shared]
+        print(f"{name:<14}{'separate':<16}{base.seconds:>9.2f}{base.throughput():>9.0f}")
+        print(f"{name:<14}{'shared prefixes':<16}{shared.seconds:>9.2f}{shared.throughput():>9.0f}"
+              f"{shared.edges:>9}{shared.new_edges:>10}{shared.shared_edges():>8.1%}"
+              f"{base.seconds / shared.seconds:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark ``custom_parser.Parser`` against NLTK's ``ChartParser`` and
+``FeatureChartParser`` on the shipped corpora, and write the results as
+JSON which can be diffed between commits:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --output new.json --compare bench.json
+
+For each corpus and parser, the time of a parse is the time to build the
+chart and extract its first tree. The suite reports the p50/p95/p99
+latency, the throughput, the edges per sentence, by sentence length
+bucket as well, and the peak RSS of the process, each corpus and parser
+being run in a fresh process.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import nltk
+from nltk import CFG, ChartParser
+from nltk.parse.featurechart import FeatureChartParser
+
+from compiled_grammar import load_grammar
+from custom_parser import Parser
+from benchmarks import QUESTION_GRAMMAR, SAMPLE_GRAMMAR, SAMPLES, question_corpus, sample_corpus
+
+SAMPLES_ERROR = './output/samples_error.txt'
+SENTENCES = './input/sentences.txt'
+
+# name -> (grammar, file), a file of None being the main.py queries
+CORPORA = {
+    "queries": (QUESTION_GRAMMAR, None),
+    "sentences": (SAMPLE_GRAMMAR, SENTENCES),
+    "samples": (SAMPLE_GRAMMAR, SAMPLES),
+    "samples_error": (SAMPLE_GRAMMAR, SAMPLES_ERROR),
+}
+
+PARSERS = ("custom", "custom_lc", "nltk_chart", "nltk_feature")
+
+# Relative change of p50 or throughput reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def make_parser(name, grammar_path):
+    """
+    Return the parser ``name`` for the grammar file ``grammar_path``, or
+    None if it cannot parse it.
+    """
+    if name == "nltk_chart":
+        if grammar_path.endswith(".fcfg"):
+            return None
+        with open(grammar_path, "r", encoding="utf-8") as file:
+            return ChartParser(CFG.fromstring(file.read()))
+    grammar = load_grammar(grammar_path, format="fcfg")
+    if name == "custom":
+        return Parser(grammar)
+    if name == "custom_lc":
+        return Parser(grammar, left_corner_filter=True)
+    if name == "nltk_feature":
+        return FeatureChartParser(grammar.grammar)
+    raise ValueError("Unknown parser: %s" % name)
+
+
+def load_corpus(name, limit=None):
+    grammar_path, filename = CORPORA[name]
+    if filename is None:
+        return question_corpus()[:limit]
+    grammar = load_grammar(grammar_path, format="fcfg").grammar
+    return sample_corpus(grammar, filename, limit=limit)
+
+
+def percentile(values, q):
+    """
+    Return the ``q`` percentile of the sorted ``values``, by nearest rank.
+    """
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(times, edges):
+    """
+    Return the latency percentiles in milliseconds, the throughput and the
+    edges per sentence of the parses taking ``times`` seconds.
+    """
+    ordered = sorted(times)
+    total = sum(times)
+    return {
+        "sentences": len(times),
+        "p50_ms": round(1000 * percentile(ordered, 50), 4) if times else None,
+        "p95_ms": round(1000 * percentile(ordered, 95), 4) if times else None,
+        "p99_ms": round(1000 * percentile(ordered, 99), 4) if times else None,
+        "mean_ms": round(1000 * total / len(times), 4) if times else None,
+        "throughput": round(len(times) / total, 2) if total else None,
+        "edges_per_sentence": round(sum(edges) / len(edges), 2) if edges else None,
+    }
+
+
+def length_bucket(length, width):
+    low = (length - 1) // width * width + 1
+    return "%d-%d" % (low, low + width - 1)
+
+
+def run(corpus_name, parser_name, limit=None, bucket_width=5, warmup=5):
+    """
+    Parse a corpus with a parser, and return its results, or None if the
+    parser cannot parse the corpus. Run it in a fresh process to measure
+    its peak RSS.
+    """
+    parser = make_parser(parser_name, CORPORA[corpus_name][0])
+    if parser is None:
+        return None
+    corpus = load_corpus(corpus_name, limit)
+    start_symbol = parser.grammar().start()
+
+    for tokens in corpus[:warmup]:
+        try:
+            next(parser.chart_parse(tokens).parses(start_symbol), None)
+        except ValueError:
+            pass
+
+    times, edges, lengths = [], [], []
+    not_covered = no_parse = 0
+    for tokens in corpus:
+        start = time.perf_counter()
+        try:
+            chart = parser.chart_parse(tokens)
+            tree = next(iter(chart.parses(start_symbol)), None)
+        except ValueError:
+            # Raised by check_coverage
+            not_covered += 1
+            continue
+        times.append(time.perf_counter() - start)
+        edges.append(chart.num_edges())
+        lengths.append(len(tokens))
+        no_parse += tree is None
+
+    buckets = {}
+    for length, seconds, num_edges in zip(lengths, times, edges):
+        bucket = buckets.setdefault(length_bucket(length, bucket_width), ([], []))
+        bucket[0].append(seconds)
+        bucket[1].append(num_edges)
+
+    result = summarize(times, edges)
+    result.update(
+        not_covered=not_covered,
+        no_parse=no_parse,
+        # KiB on Linux
+        peak_rss_kib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        by_length={
+            name: summarize(*buckets[name])
+            for name in sorted(buckets, key=lambda name: int(name.split("-")[0]))
+        },
+    )
+    return result
+
+
+def run_isolated(corpus_name, parser_name, limit, bucket_width):
+    # spawn, so that the RSS of the benchmark process is not inherited
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run, (corpus_name, parser_name, limit, bucket_width))
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "nltk": nltk.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Return the lines describing the p50 and throughput changes of ``new``
+    relative to ``old``, regressions larger than ``threshold`` being marked.
+    """
+    lines = []
+    for corpus_name, parsers in new["results"].items():
+        for parser_name, result in parsers.items():
+            old_result = old.get("results", {}).get(corpus_name, {}).get(parser_name)
+            if not result or not old_result or not old_result["p50_ms"] or not result["p50_ms"]:
+                continue
+            p50 = result["p50_ms"] / old_result["p50_ms"] - 1
+            throughput = result["throughput"] / old_result["throughput"] - 1
+            mark = "REGRESSION" if p50 > threshold or throughput < -threshold else ""
+            lines.append(f"{corpus_name:<15}{parser_name:<14}p50 {p50:>+8.1%}  "
+                         f"throughput {throughput:>+8.1%}  {mark}")
+    return lines
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", action="append", choices=sorted(CORPORA),
+                            help="corpus to parse, may be repeated (default: all)")
+    arg_parser.add_argument("--parser", action="append", choices=PARSERS,
+                            help="parser to run, may be repeated (default: all)")
+    arg_parser.add_argument("--limit", type=int, default=None,
+                            help="maximum number of sentences of each corpus")
+    arg_parser.add_argument("--bucket-width", type=int, default=5,
+                            help="width of the sentence length buckets, in tokens")
+    arg_parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    arg_parser.add_argument("--compare", default=None,
+                            help="previous JSON results to compare the new ones with")
+    args = arg_parser.parse_args()
+
+    report = {"environment": environment(), "limit": args.limit, "results": {}}
+    print(f"{'corpus':<15}{'parser':<14}{'sents':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'sent/s':>9}{'edges':>9}{'RSS MiB':>9}")
+    for corpus_name in args.corpus or list(CORPORA):
+        results = report["results"][corpus_name] = {}
+        for parser_name in args.parser or PARSERS:
+            result = results[parser_name] = run_isolated(corpus_name, parser_name, args.limit,
+                                                         args.bucket_width)
+            if result is None or not result["sentences"]:
+                continue
+            print(f"{corpus_name:<15}{parser_name:<14}{result['sentences']:>7}"
+                  f"{result['p50_ms']:>9.3f}{result['p95_ms']:>9.3f}{result['p99_ms']:>9.3f}"
+                  f"{result['throughput']:>9.1f}{result['edges_per_sentence']:>9.1f}"
+                  f"{result['peak_rss_kib'] / 1024:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            lines = compare(json.load(file), report)
+        print("\n".join(lines))
+        if any(line.endswith("REGRESSION") for line in lines):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""
+CKY recognizer and parser for plain CFGs such as p1_grammar.cfg.
+
+    python cky.py output/samples.txt
+
+prints the number of grammatical lines of a file, recognized together
+by ``CKYParser.recognize_many``.
+"""
+import argparse
+import sys
+import time
+
+from nltk import Tree
+from nltk.grammar import FeatStructNonterminal, is_nonterminal
+from nltk.parse.api import ParserI
+
+from compiled_grammar import CompiledGrammar, load_grammar, symbol_type
+from tokenizer import Tokenizer
+
+
+class CNFGrammar:
+    """
+    A CFG compiled to Chomsky normal form for CKY, keeping what is needed
+    to recover the trees of the original grammar:
+
+    - terminals in productions of two or more symbols are lifted to new
+      preterminals ``<word>``
+    - productions of three or more symbols are binarized to the right,
+      ``A -> B C D`` becoming ``A -> B A|<C-D>`` and ``A|<C-D> -> C D``
+    - unit productions ``A -> B`` are removed by closure: every cell
+      which has ``B`` also has ``A``, which is folded into the lexical
+      and binary masks below
+
+    Symbols are numbered, and sets of symbols are int bitsets.
+
+    - ``lexical``: word -> bitset of the symbols deriving it
+    - ``binary``: left child -> (bitset of the right children, right
+      child -> bitset of the parents)
+    """
+
+    def __init__(self, grammar):
+        # symbol -> id, the symbols being category names
+        self.ids = {}
+        self.symbols = []
+        # id -> label of the trees, None for the symbols added by the compilation
+        self.labels = []
+
+        lexical_rules = {}
+        unit_rules = {}
+        binary_rules = {}
+
+        for prod in grammar.productions():
+            lhs = self._symbol(symbol_type(prod.lhs()), prod.lhs())
+            rhs = prod.rhs()
+            if not rhs:
+                raise ValueError("CKY does not support empty productions: %s" % prod)
+            if len(rhs) == 1:
+                if is_nonterminal(rhs[0]):
+                    _check_plain(rhs[0])
+                    unit_rules.setdefault(self._symbol(symbol_type(rhs[0]), rhs[0]), set()).add(lhs)
+                else:
+                    lexical_rules.setdefault(rhs[0], set()).add(lhs)
+                continue
+
+            children = []
+            for sym in rhs:
+                if is_nonterminal(sym):
+                    _check_plain(sym)
+                    children.append(self._symbol(symbol_type(sym), sym))
+                else:
+                    # A new preterminal for the word
+                    preterminal = self._symbol("<%s>" % sym)
+                    lexical_rules.setdefault(sym, set()).add(preterminal)
+                    children.append(preterminal)
+
+            parent = lhs
+            name = symbol_type(prod.lhs())
+            while len(children) > 2:
+                rest = self._symbol("%s|<%s>" % (name, "-".join(
+                    self.symbols[child] for child in children[1:])))
+                binary_rules.setdefault((children[0], rest), set()).add(parent)
+                parent, children = rest, children[1:]
+            binary_rules.setdefault(tuple(children), set()).add(parent)
+
+        self.start = self.ids[symbol_type(grammar.start())]
+
+        # The closure of the unit productions: symbol -> bitset of the
+        # symbols which derive it through unit productions, itself included.
+        self.unit_closure = []
+        for sym in range(len(self.symbols)):
+            closure, stack = 0, [sym]
+            while stack:
+                current = stack.pop()
+                if closure >> current & 1:
+                    continue
+                closure |= 1 << current
+                stack.extend(unit_rules.get(current, ()))
+            self.unit_closure.append(closure)
+
+        self.lexical = {}
+        for word, parents in lexical_rules.items():
+            mask = 0
+            for parent in parents:
+                mask |= self.unit_closure[parent]
+            self.lexical[word] = mask
+
+        self.binary = {}
+        for (left, right), parents in binary_rules.items():
+            right_mask, by_right = self.binary.setdefault(left, (0, {}))
+            for parent in parents:
+                by_right[right] = by_right.get(right, 0) | self.unit_closure[parent]
+            self.binary[left] = (right_mask | 1 << right, by_right)
+        self.left_mask = 0
+        for left in self.binary:
+            self.left_mask |= 1 << left
+
+        # (left, right, parents) of the binary productions, the parents
+        # being the unit closure of their left-hand sides, for recognize_many
+        self.binary_list = []
+        for left, (_, by_right) in sorted(self.binary.items()):
+            for right, mask in sorted(by_right.items()):
+                self.binary_list.append((left, right, _bits(mask)))
+
+        # For the recovery of the trees, from the parent symbols.
+        self.lexical_rules = lexical_rules
+        self.unit_children = {}
+        for child, parents in unit_rules.items():
+            for parent in parents:
+                self.unit_children.setdefault(parent, []).append(child)
+        self.binary_children = {}
+        for children, parents in binary_rules.items():
+            for parent in parents:
+                self.binary_children.setdefault(parent, []).append(children)
+
+    def _symbol(self, name, label=None):
+        sym = self.ids.get(name)
+        if sym is None:
+            sym = self.ids[name] = len(self.symbols)
+            self.symbols.append(name)
+            self.labels.append(label)
+        elif label is not None and self.labels[sym] is None:
+            self.labels[sym] = label
+        return sym
+
+    def num_symbols(self):
+        return len(self.symbols)
+
+
+def _bits(mask):
+    """
+    Return the indexes of the bits set in ``mask``.
+    """
+    bits = []
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        bits.append(low.bit_length() - 1)
+    return bits
+
+
+def _check_plain(symbol):
+    if isinstance(symbol, FeatStructNonterminal) and len(symbol) > 1:
+        raise ValueError("CKY needs a grammar without features: %s" % symbol)
+
+
+class CKYParser(ParserI):
+    """
+    CKY over the ``CNFGrammar`` of a plain CFG. The table has one bitset
+    of symbols per span, so that recognizing a sentence combines ints
+    instead of chart edges. ``parse`` recovers the trees of the original
+    grammar from the table, lazily.
+
+    :param grammar: A ``CFG``, a ``FeatureGrammar`` without features, a
+        ``CompiledGrammar`` or the path of a grammar file
+    """
+
+    def __init__(self, grammar):
+        if isinstance(grammar, str):
+            grammar = load_grammar(grammar)
+        if isinstance(grammar, CompiledGrammar):
+            grammar = grammar.grammar
+        self._grammar = grammar
+        self._cnf = CNFGrammar(grammar)
+
+    def grammar(self):
+        return self._grammar
+
+    def cnf(self):
+        return self._cnf
+
+    def table(self, tokens):
+        """
+        Return the CKY table of ``tokens``: ``table[i][j]`` is the bitset
+        of the symbols deriving ``tokens[i:j]``, or None if a token is
+        not in the grammar.
+        """
+        cnf = self._cnf
+        lexical = cnf.lexical
+        binary = cnf.binary
+        left_mask = cnf.left_mask
+        n = len(tokens)
+        table = [[0] * (n + 1) for _ in range(n + 1)]
+        for i, token in enumerate(tokens):
+            mask = lexical.get(token)
+            if not mask:
+                return None
+            table[i][i + 1] = mask
+
+        for span in range(2, n + 1):
+            for i in range(n - span + 1):
+                j = i + span
+                row = table[i]
+                mask = 0
+                for k in range(i + 1, j):
+                    lefts = row[k] & left_mask
+                    if not lefts:
+                        continue
+                    rights = table[k][j]
+                    if not rights:
+                        continue
+                    while lefts:
+                        low = lefts & -lefts
+                        lefts ^= low
+                        right_mask, by_right = binary[low.bit_length() - 1]
+                        matches = rights & right_mask
+                        while matches:
+                            right = matches & -matches
+                            matches ^= right
+                            mask |= by_right[right.bit_length() - 1]
+                row[j] = mask
+        return table
+
+    def recognize(self, tokens):
+        """
+        Return True if ``tokens`` is a sentence of the grammar.
+        """
+        table = self.table(tokens)
+        return table is not None and bool(table[0][len(tokens)] >> self._cnf.start & 1)
+
+    def recognize_many(self, sentences):
+        """
+        Return for each sentence of ``sentences`` whether it is a sentence
+        of the grammar, like ``recognize``.
+
+        The sentences of the same length are recognized together in a
+        bit-sliced table: ``table[i][j][symbol]`` is an int whose bit ``b``
+        tells whether ``symbol`` derives the span ``i:j`` of the ``b``-th
+        sentence. A binary production is then applied to every sentence
+        at once by and-ing two ints, and the cost of a length is the same
+        for one sentence or thousands.
+
+        :rtype: list(bool)
+        """
+        cnf = self._cnf
+        lexical = cnf.lexical
+        results = [False] * len(sentences)
+
+        # length -> indexes of the sentences whose tokens are all in the grammar
+        by_length = {}
+        for index, tokens in enumerate(sentences):
+            if tokens and all(token in lexical for token in tokens):
+                by_length.setdefault(len(tokens), []).append(index)
+
+        for length, indexes in by_length.items():
+            accepted = self._recognize_length([sentences[index] for index in indexes], length)
+            for bit, index in enumerate(indexes):
+                results[index] = bool(accepted >> bit & 1)
+        return results
+
+    def _recognize_length(self, sentences, n):
+        """
+        Recognize ``sentences`` of ``n`` tokens, and return the bitset of
+        the accepted ones.
+        """
+        cnf = self._cnf
+        num_symbols = cnf.num_symbols()
+        binary_list = cnf.binary_list
+        table = [[None] * (n + 1) for _ in range(n + 1)]
+
+        for i in range(n):
+            cell = [0] * num_symbols
+            for bit, tokens in enumerate(sentences):
+                for sym in _bits(cnf.lexical[tokens[i]]):
+                    cell[sym] |= 1 << bit
+            table[i][i + 1] = cell
+
+        for span in range(2, n + 1):
+            for i in range(n - span + 1):
+                j = i + span
+                cell = [0] * num_symbols
+                for k in range(i + 1, j):
+                    left_cell = table[i][k]
+                    right_cell = table[k][j]
+                    for left, right, parents in binary_list:
+                        both = left_cell[left] & right_cell[right]
+                        if both:
+                            for parent in parents:
+                                cell[parent] |= both
+                table[i][j] = cell
+        return table[0][n][cnf.start]
+
+    def parse(self, tokens, max_trees=None):
+        """
+        Return an iterator of the trees of ``tokens`` in the original
+        grammar, built lazily from the table.
+
+        :raise ValueError: If a token is not in the grammar
+        """
+        tokens = list(tokens)
+        self._grammar.check_coverage(tokens)
+        table = self.table(tokens)
+        trees = self._trees(tokens, table)
+        if max_trees is not None:
+            trees = (tree for _, tree in zip(range(max_trees), trees))
+        return trees
+
+    def _trees(self, tokens, table):
+        n = len(tokens)
+        start = self._cnf.start
+        if table is None or n == 0 or not table[0][n] >> start & 1:
+            return
+        for children in self._children(tokens, table, start, 0, n, frozenset()):
+            yield self._node(start, children)
+
+    def _node(self, sym, children):
+        return Tree(self._cnf.labels[sym], children)
+
+    def _expand(self, sym, children):
+        """
+        Return the nodes that the derivation ``children`` of ``sym`` adds
+        to its parent: a tree, or the children themselves for the symbols
+        added by the compilation.
+        """
+        if self._cnf.labels[sym] is None:
+            return children
+        return [self._node(sym, children)]
+
+    def _children(self, tokens, table, sym, i, j, path):
+        """
+        Generate the lists of children of the derivations of ``sym`` over
+        ``tokens[i:j]``. ``path`` holds the (symbol, i, j) of the unit
+        productions being expanded, to stop on unit cycles.
+        """
+        cnf = self._cnf
+        if j == i + 1 and sym in cnf.lexical_rules.get(tokens[i], ()):
+            yield [tokens[i]]
+
+        for child in cnf.unit_children.get(sym, ()):
+            if table[i][j] >> child & 1 and (child, i, j) not in path:
+                for children in self._children(tokens, table, child, i, j, path | {(child, i, j)}):
+                    yield self._expand(child, children)
+
+        for left, right in cnf.binary_children.get(sym, ()):
+            for k in range(i + 1, j):
+                if not (table[i][k] >> left & 1 and table[k][j] >> right & 1):
+                    continue
+                for left_children in self._children(tokens, table, left, i, k, frozenset()):
+                    left_nodes = self._expand(left, left_children)
+                    for right_children in self._children(tokens, table, right, k, j, frozenset()):
+                        yield left_nodes + self._expand(right, right_children)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("--grammar", default="./p1_grammar.cfg")
+    args = arg_parser.parse_args()
+
+    compiled = load_grammar(args.grammar)
+    parser = CKYParser(compiled)
+    tokenizer = Tokenizer.from_grammar(compiled.grammar)
+    with open(args.input, "r", encoding="utf-8") as file:
+        sentences = [tokenizer.tokenize(line) for line in file if line.strip()]
+
+    start = time.perf_counter()
+    recognized = sum(parser.recognize_many(sentences))
+    seconds = time.perf_counter() - start
+    print("%d / %d grammatical sentences, recognized in %.3fs" % (recognized, len(sentences), seconds))
+    sys.exit(0 if recognized == len(sentences) else 1)
+
+
+if __name__ == '__main__':
+    main()
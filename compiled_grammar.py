@@ -0,0 +1,236 @@
+import hashlib
+import io
+import os
+import pickle
+
+import nltk
+from nltk import CFG, FeatStruct, TYPE
+from nltk.grammar import FeatureGrammar, is_nonterminal
+
+from feature_unify import FeatureUnifier
+
+# Bump when the layout of ``CompiledGrammar`` changes, so that stale
+# artifacts are rebuilt instead of loaded.
+COMPILED_GRAMMAR_VERSION = 4
+
+CACHE_DIR_NAME = ".grammar_cache"
+
+
+def symbol_type(symbol):
+    """
+    Return the category name of a nonterminal: the ``TYPE`` feature for
+    feature grammars, the symbol itself for plain CFGs.
+    """
+    if isinstance(symbol, dict) and TYPE in symbol:
+        return symbol[TYPE]
+    return symbol.symbol()
+
+
+class CompiledGrammar:
+    """
+    A loaded grammar together with the lookup tables the parsers need.
+    It is what gets stored in the grammar cache, so building it is paid
+    once per grammar file instead of once per process.
+
+    - ``nullable``: categories that can derive the empty string
+    - ``leftcorners``: category -> set of categories it can start with
+      (reflexive, transitive closure of the immediate left corner relation,
+      in which the symbols after nullable ones are left corners too)
+    - ``preterminals``: terminal -> set of categories that have a
+      production starting with this terminal
+    - ``leftcorner_words``: category -> set of terminals it can start with
+    - ``non_initial``: categories that can start a constituent which is
+      not the first child of its parent
+    """
+
+    def __init__(self, grammar, grammar_hash=None):
+        self.grammar = grammar
+        if grammar_hash is None:
+            grammar_hash = hashlib.sha256(str(grammar).encode("utf-8")).hexdigest()
+        self.grammar_hash = grammar_hash
+
+        self.nullable = _nullable(grammar.productions())
+
+        immediate = {}
+        preterminals = {}
+        non_initial = set()
+        for prod in grammar.productions():
+            cat = symbol_type(prod.lhs())
+            corners = immediate.setdefault(cat, {cat})
+            for sym in prod.rhs():
+                if not is_nonterminal(sym):
+                    preterminals.setdefault(sym, set()).add(cat)
+                    break
+                corners.add(symbol_type(sym))
+                if symbol_type(sym) not in self.nullable:
+                    break
+            non_initial.update(symbol_type(sym) for sym in prod.rhs()[1:] if is_nonterminal(sym))
+
+        self.leftcorners = _transitive_closure(immediate)
+        self.preterminals = preterminals
+
+        self.leftcorner_words = {cat: set() for cat in self.leftcorners}
+        for word, cats in preterminals.items():
+            for cat, corners in self.leftcorners.items():
+                if not corners.isdisjoint(cats):
+                    self.leftcorner_words[cat].add(word)
+
+        self.non_initial = set()
+        for cat in non_initial:
+            self.non_initial.update(self.leftcorners.get(cat, (cat,)))
+
+        self.has_empty_productions = any(not prod.rhs() for prod in grammar.productions())
+
+        self._unifier = None
+
+    def start(self):
+        return self.grammar.start()
+
+    def unifier(self):
+        """
+        Return the ``FeatureUnifier`` of a feature grammar, built on first
+        use, or None for a plain CFG.
+        """
+        if self._unifier is None and isinstance(self.grammar, FeatureGrammar):
+            self._unifier = FeatureUnifier(self.grammar)
+        return self._unifier
+
+    def is_leftcorner(self, cat, left):
+        """
+        True if the category ``left`` can be the first symbol of
+        something derived from the category ``cat``.
+        """
+        return left in self.leftcorners.get(cat, (cat,))
+
+    def is_leftcorner_word(self, cat, word):
+        """
+        True if the terminal ``word`` can be the first word of something
+        derived from the category ``cat``.
+        """
+        return word in self.leftcorner_words.get(cat, ())
+
+
+def _nullable(productions):
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for prod in productions:
+            cat = symbol_type(prod.lhs())
+            if cat not in nullable and all(
+                    is_nonterminal(sym) and symbol_type(sym) in nullable for sym in prod.rhs()):
+                nullable.add(cat)
+                changed = True
+    return nullable
+
+
+def _transitive_closure(graph):
+    closure = {}
+    for node in graph:
+        seen = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(graph.get(current, ()))
+        closure[node] = seen
+    return closure
+
+
+class _GrammarPickler(pickle.Pickler):
+    """
+    Frozen feature structures cache their hash value, and string hashes
+    change between processes. Drop the cached value so that it is
+    recomputed by the process which loads the artifact.
+    """
+
+    def __init__(self, file, protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__(file, protocol=protocol)
+        self._protocol = protocol
+
+    def reducer_override(self, obj):
+        if isinstance(obj, FeatStruct) and "_hash" in obj.__dict__:
+            reduced = list(obj.__reduce_ex__(self._protocol))
+            reduced[2] = {k: v for k, v in reduced[2].items() if k != "_hash"}
+            return tuple(reduced)
+        return NotImplemented
+
+
+def grammar_format(path):
+    return "fcfg" if path.endswith(".fcfg") else "cfg"
+
+
+def grammar_hash(content, format):
+    """
+    Key of the compiled artifact: the grammar text, its format, the
+    artifact layout and the NLTK version that produced the objects.
+    """
+    digest = hashlib.sha256()
+    digest.update(("%s:%s:%s:" % (COMPILED_GRAMMAR_VERSION, nltk.__version__, format)).encode())
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def compile_grammar(content, format, grammar_hash=None):
+    text = content.decode("utf-8")
+    if format == "fcfg":
+        grammar = FeatureGrammar.fromstring(text)
+    else:
+        grammar = CFG.fromstring(text)
+    return CompiledGrammar(grammar, grammar_hash)
+
+
+def dumps(obj):
+    """
+    Pickle a compiled grammar, or anything holding feature structures,
+    so that it can be loaded by another process.
+    """
+    buffer = io.BytesIO()
+    _GrammarPickler(buffer).dump(obj)
+    return buffer.getvalue()
+
+
+def load_grammar(path, format=None, cache_dir=None):
+    """
+    Return the ``CompiledGrammar`` of a grammar file, reading it from the
+    cache when an artifact for the same content exists, otherwise
+    compiling it and storing the artifact.
+
+    :param format: "fcfg" or "cfg", guessed from the file extension if None
+    :param cache_dir: where the artifacts are stored, ``.grammar_cache``
+        next to the grammar file by default. False disables the cache.
+    """
+    if format is None:
+        format = grammar_format(path)
+    with open(path, "rb") as file:
+        content = file.read()
+    key = grammar_hash(content, format)
+
+    if cache_dir is False:
+        return compile_grammar(content, format, key)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    artifact = os.path.join(cache_dir, "%s.%s.pickle" % (os.path.basename(path), key[:16]))
+
+    try:
+        with open(artifact, "rb") as file:
+            compiled = pickle.load(file)
+        if compiled.grammar_hash == key:
+            return compiled
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    compiled = compile_grammar(content, format, key)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename, so that concurrent workers never read a
+        # partial artifact.
+        tmp = "%s.%d.tmp" % (artifact, os.getpid())
+        with open(tmp, "wb") as file:
+            file.write(dumps(compiled))
+        os.replace(tmp, artifact)
+    except OSError:
+        pass
+    return compiled
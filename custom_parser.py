@@ -1,8 +1,86 @@
+import os
+import pickle
+import time
+from multiprocessing import Pool
+
+from nltk.parse import featurechart
 from nltk.parse.chart import ParserI, Tree, LeafInitRule
-from nltk.parse.featurechart import FeatureEmptyPredictRule, FeatureBottomUpPredictCombineRule, \
-    FeatureSingleEdgeFundamentalRule
+from nltk.parse.featurechart import FeatureEmptyPredictRule
 
+from compiled_grammar import CompiledGrammar, load_grammar, dumps, symbol_type
 from custom_chart import FeatureChart
+from custom_rules import FeatureBottomUpPredictCombineRule, FeatureFilteredBottomUpPredictCombineRule, \
+    FeatureSingleEdgeFundamentalRule
+from parse_stats import ParseStats
+
+STATUS_BUDGET_EXCEEDED = "budget_exceeded"
+
+BU_LC_FEATURE_STRATEGY = [
+    LeafInitRule(),
+    FeatureEmptyPredictRule(),
+    FeatureBottomUpPredictCombineRule(),
+    FeatureSingleEdgeFundamentalRule(),
+]
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised by ``Parser.chart_parse`` when the parse of a sentence goes past
+    its deadline or its maximum number of edges, with the statistics of
+    the partial chart.
+    """
+
+    def __init__(self, reason, num_tokens, num_edges, num_processed, agenda_size, seconds):
+        # Keep every argument in args, so that it can be pickled
+        super().__init__(reason, num_tokens, num_edges, num_processed, agenda_size, seconds)
+        self.reason = reason
+        self.num_tokens = num_tokens
+        self.num_edges = num_edges
+        self.num_processed = num_processed
+        self.agenda_size = agenda_size
+        self.seconds = seconds
+
+    def __str__(self):
+        return "Parse budget exceeded (%s): %d edges after %.3fs for %d tokens" % (
+            self.reason, self.num_edges, self.seconds, self.num_tokens)
+
+    def stats(self):
+        """
+        Return the statistics of the aborted parse as a dict.
+        """
+        return {
+            "status": STATUS_BUDGET_EXCEEDED,
+            "reason": self.reason,
+            "num_tokens": self.num_tokens,
+            "num_edges": self.num_edges,
+            "num_processed": self.num_processed,
+            "agenda_size": self.agenda_size,
+            "seconds": self.seconds,
+        }
+
+
+class _Budget:
+    """
+    The deadline and the maximum number of edges of one parse.
+    """
+
+    def __init__(self, timeout, deadline, max_edges):
+        self.start = time.monotonic()
+        if timeout is not None:
+            timeout_deadline = self.start + timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+        self.deadline = deadline
+        self.max_edges = max_edges
+
+    def check(self, chart, num_processed, agenda_size):
+        if self.max_edges is not None and chart.num_edges() > self.max_edges:
+            reason = "max_edges"
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            reason = "deadline"
+        else:
+            return
+        raise BudgetExceeded(reason, chart.num_leaves(), chart.num_edges(), num_processed,
+                             agenda_size, time.monotonic() - self.start)
 
 
 class Parser(ParserI):
@@ -12,15 +90,63 @@ class Parser(ParserI):
     Parsed structure: FeatureChart
     """
 
-    def __init__(self, grammar, trace=None):
+    def __init__(self, grammar, strategy=BU_LC_FEATURE_STRATEGY, trace=None, use_agenda=True,
+                 left_corner_filter=False, chart_class=FeatureChart, cache=None, timeout=None,
+                 max_edges=None, stats=False, fast_unify=True):
+        """
+        :param grammar: A ``FeatureGrammar``, a ``CompiledGrammar`` or the
+            path of a grammar file, which is loaded through the compiled
+            grammar cache
+        :param strategy: A list of rules that should be used to decide
+            what edges to add to the chart
+        :param use_agenda: Use the agenda-based algorithm, where every new
+            edge is processed exactly once by the inference rules, instead of
+            re-applying every rule to the whole chart until nothing changes.
+            Only possible when the strategy consists of axioms
+            (NUM_EDGES == 0) and inference rules (NUM_EDGES == 1).
+        :param left_corner_filter: Replace the bottom-up predict rule of the
+            strategy by ``FeatureFilteredBottomUpPredictCombineRule``, which
+            does not predict edges that cannot lead to a spanning parse.
+            The number of pruned edges is given by ``Chart.num_pruned``.
+        :param chart_class: The class of the chart, ``FeatureChart`` or
+            ``InternedFeatureChart``
+        :param cache: A ``ParseCache`` used by ``parse_sems``, or None
+        :param timeout: The default number of seconds of ``chart_parse``
+        :param max_edges: The default maximum number of edges of ``chart_parse``
+        :param stats: Record a ``ParseStats`` of each parse in ``Chart.stats``,
+            aggregated over all parses in ``Parser.stats``
+        :param fast_unify: Unify the flat features of the grammar with its
+            ``FeatureUnifier`` instead of ``nltk.unify``
+        """
+        if isinstance(grammar, str):
+            grammar = load_grammar(grammar)
+        if isinstance(grammar, CompiledGrammar):
+            self._compiled = grammar
+            grammar = grammar.grammar
+        else:
+            self._compiled = None
+
         self._grammar = grammar
-        self._strategy = [
-            LeafInitRule(),
-            FeatureEmptyPredictRule(),
-            FeatureBottomUpPredictCombineRule(),
-            FeatureSingleEdgeFundamentalRule(),
-        ]
-        self._chart_class = FeatureChart
+        # To build the same parser in the workers of parse_batch.
+        self._options = dict(strategy=strategy, use_agenda=use_agenda,
+                             left_corner_filter=left_corner_filter, chart_class=chart_class,
+                             timeout=timeout, max_edges=max_edges, stats=stats,
+                             fast_unify=fast_unify)
+        if left_corner_filter:
+            strategy = [
+                FeatureFilteredBottomUpPredictCombineRule(self.compiled_grammar())
+                if isinstance(rule, featurechart.FeatureBottomUpPredictCombineRule)
+                and not isinstance(rule, FeatureFilteredBottomUpPredictCombineRule) else rule
+                for rule in strategy
+            ]
+        self._strategy = strategy
+        self._use_agenda = use_agenda
+        self._chart_class = chart_class
+        self._cache = cache
+        self._timeout = timeout
+        self._max_edges = max_edges
+        self._stats = ParseStats() if stats else None
+        self._unifier = self.compiled_grammar().unifier() if fast_unify else None
 
         # For trace
         self._trace = trace
@@ -39,6 +165,22 @@ class Parser(ParserI):
     def grammar(self):
         return self._grammar
 
+    def stats(self):
+        """
+        Return the ``ParseStats`` of all the parses of this parser, or None
+        if they are not recorded.
+        """
+        return self._stats
+
+    def compiled_grammar(self):
+        """
+        Return the ``CompiledGrammar`` of the parser, compiling it on first
+        use when the parser was built from a plain grammar.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledGrammar(self._grammar)
+        return self._compiled
+
     def _trace_new_edges(self, chart, rule, new_edges, trace, edge_width):
         if not trace:
             return
@@ -49,40 +191,551 @@ class Parser(ParserI):
                 print_rule_header = False
             print(chart.pretty_format_edge(edge, edge_width))
 
-    def chart_parse(self, tokens, trace=None):
+    def chart_parse(self, tokens, trace=None, timeout=None, deadline=None, max_edges=None):
         """
         Return the final parse ``Chart`` from which all possible
         parse trees can be extracted.
 
+        The budget of the parse is checked after each processed edge (each
+        rule application without the agenda), and the parse is aborted
+        with ``BudgetExceeded`` when it is exceeded.
+
         :param tokens: The sentence to be parsed
         :type tokens: list(str)
+        :param timeout: The maximum number of seconds of the parse, the
+            parser's default if None
+        :param deadline: The ``time.monotonic()`` time at which the parse
+            is aborted, e.g. the deadline of a whole request
+        :param max_edges: The maximum number of edges of the chart, the
+            parser's default if None
         :rtype: Chart
+        :raise BudgetExceeded: If the deadline or the number of edges is exceeded
         """
         if trace is None:
             trace = self._trace
-        trace_new_edges = self._trace_new_edges
-
         tokens = list(tokens)
         self._grammar.check_coverage(tokens)
         chart = self._chart_class(tokens)
+        chart.unifier = self._unifier
+        self._fill_chart_with_stats(chart, self._budget(timeout, deadline, max_edges), trace,
+                                    len(tokens))
+
+        # Return the final chart.
+        return chart
+
+    def _budget(self, timeout=None, deadline=None, max_edges=None):
+        """
+        Return the ``_Budget`` of a parse, the parser's defaults being used
+        for the limits which are None, or None if there is no limit.
+        """
+        if timeout is None:
+            timeout = self._timeout
+        if max_edges is None:
+            max_edges = self._max_edges
+        if timeout is None and deadline is None and max_edges is None:
+            return None
+        return _Budget(timeout, deadline, max_edges)
+
+    def _fill_chart_with_stats(self, chart, budget, trace, num_tokens, num_parses=1):
+        """
+        ``_fill_chart``, recording the ``ParseStats`` of the new edges in
+        ``chart.stats`` and in the stats of the parser.
+        """
+        if self._stats is None:
+            self._fill_chart(chart, budget, trace)
+            return
+
+        stats = chart.stats = ParseStats()
+        num_edges = chart.num_edges()
+        num_pruned = chart.num_pruned()
+        start = time.perf_counter()
+        try:
+            self._fill_chart(chart, budget, trace)
+        except BudgetExceeded:
+            stats.budget_exceeded += 1
+            raise
+        finally:
+            stats.parses += num_parses
+            stats.tokens += num_tokens
+            stats.edges += chart.num_edges() - num_edges
+            stats.pruned += chart.num_pruned() - num_pruned
+            stats.parse_seconds += time.perf_counter() - start
+            self._stats.merge(stats)
+
+    def _fill_chart(self, chart, budget, trace):
+        """
+        Apply the rules of the strategy to ``chart`` until no edge can be added.
+        """
         grammar = self._grammar
+        trace_new_edges = self._trace_new_edges
+        stats = chart.stats
 
         # Width, for printing trace edges.
         trace_edge_width = self._trace_chart_width // (chart.num_leaves() + 1)
         if trace:
             print(chart.pretty_format_leaves(trace_edge_width))
 
-        edges_added = True
-        while edges_added:
-            edges_added = False
-            for rule in self._strategy:
-                new_edges = list(rule.apply_everywhere(chart, grammar))
-                edges_added = len(new_edges)
-                trace_new_edges(chart, rule, new_edges, trace, trace_edge_width)
+        if self._use_agenda:
+            # Apply the axioms once, then process every edge exactly once
+            # against the inference rules. Only the new edges are processed,
+            # the chart of an incremental parse being filled again after
+            # each leaf.
+            agenda = []
+            for axiom in self._axioms:
+                new_edges = list(axiom.apply(chart, grammar))
+                trace_new_edges(chart, axiom, new_edges, trace, trace_edge_width)
+                if stats is not None:
+                    stats.count_rule_edges(axiom, len(new_edges))
+                agenda += new_edges
+
+            inference_rules = self._inference_rules
+            # The agenda is used as a stack, reverse it so that the
+            # leaf edges are processed from left to right.
+            agenda.reverse()
+            num_processed = 0
+            while agenda:
+                edge = agenda.pop()
+                for rule in inference_rules:
+                    new_edges = list(rule.apply(chart, grammar, edge))
+                    if trace:
+                        trace_new_edges(chart, rule, new_edges, trace, trace_edge_width)
+                    if stats is not None:
+                        stats.count_rule_edges(rule, len(new_edges))
+                    agenda += new_edges
+                num_processed += 1
+                if budget is not None:
+                    budget.check(chart, num_processed, len(agenda))
+
+        else:
+            # Apply every rule to the whole chart until no edges are added.
+            edges_added = True
+            num_processed = 0
+            while edges_added:
+                edges_added = False
+                for rule in self._strategy:
+                    new_edges = list(rule.apply_everywhere(chart, grammar))
+                    if new_edges:
+                        edges_added = True
+                    trace_new_edges(chart, rule, new_edges, trace, trace_edge_width)
+                    if stats is not None:
+                        stats.count_rule_edges(rule, len(new_edges))
+                    num_processed += 1
+                    if budget is not None:
+                        budget.check(chart, num_processed, 0)
+
+    def incremental_parse(self, trace=None, **budget):
+        """
+        Return an ``IncrementalParse``, to which the tokens of a sentence
+        are given one at a time, e.g. as they are typed. ``budget`` is
+        the ``timeout``, ``deadline`` and ``max_edges`` of each token, as
+        for ``chart_parse``.
+
+        :rtype: IncrementalParse
+        """
+        if not self._use_agenda:
+            raise ValueError("Incremental parsing needs the agenda-based algorithm")
+        return IncrementalParse(self, trace, **budget)
+
+    def cache(self):
+        return self._cache
+
+    def parse_sems(self, tokens):
+        """
+        Return the distinct ``SEM`` features of the roots of the parse
+        trees of ``tokens``, in the order of the trees. A root without
+        ``SEM`` gives None, a ``SEM`` tuple is returned as a tuple.
+
+        When the parser has a cache, the result is stored under the grammar
+        hash and the tokens, so that the same question is parsed once.
+        """
+        if self._cache is None:
+            return self._parse_sems(tokens)
+        key = self._cache.key(self.compiled_grammar().grammar_hash, tokens)
+        sems = self._cache.get(key)
+        if sems is None:
+            sems = self._parse_sems(tokens)
+            self._cache.put(key, sems)
+        return sems
+
+    def _parse_sems(self, tokens):
+        return list(self.parse_semantics(tokens))
+
+    def parse_semantics(self, tokens, witness=False, **budget):
+        """
+        Return an iterator of the distinct ``SEM`` features of the roots of
+        the parse trees of ``tokens``, in the order of the trees, as
+        ``parse_sems``. The root of a tree is the left-hand side of its
+        spanning edge, so they are read from the spanning edges of the
+        chart, without building any tree. ``budget`` is passed to
+        ``chart_parse``.
+
+        :param witness: Generate ``(sem, tree)`` pairs, ``tree`` being the
+            first parse tree with this ``SEM``, which is built only for it.
+        """
+        chart = self.chart_parse(tokens, **budget)
+        return self._semantics(chart, witness)
+
+    def _semantics(self, chart, witness):
+        sems = []
+        for edge in chart.spanning_edges(self._grammar.start()):
+            sem = edge.lhs().get('SEM')
+            if isinstance(sem, tuple):
+                sem = tuple(sem)
+            if sem in sems:
+                continue
+            sems.append(sem)
+            if witness:
+                yield sem, next(chart.iter_trees(edge, complete=True), None)
+            else:
+                yield sem
+
+    def parse_forest(self, tokens, tree_class=Tree, **budget):
+        """
+        Return the packed parse forest of ``tokens``, which counts and
+        unpacks the parse trees without enumerating them. ``budget`` is
+        passed to ``chart_parse``.
+
+        :rtype: ParseForest
+        """
+        chart = self.chart_parse(tokens, **budget)
+        return chart.forest(self._grammar.start(), tree_class=tree_class)
+
+    def parse(self, tokens, tree_class=Tree, ranked=False, max_trees=None, max_nodes=None,
+              **budget):
+        """
+        Return an iterator of the parse trees of ``tokens``, built lazily.
+        See ``Chart.parses`` for ``ranked``, ``max_trees`` and ``max_nodes``,
+        and ``chart_parse`` for the ``timeout``, ``deadline`` and
+        ``max_edges`` of ``budget``.
+        """
+        chart = self.chart_parse(tokens, **budget)
+        trees = chart.parses(self._grammar.start(), tree_class=tree_class, ranked=ranked,
+                             max_trees=max_trees, max_nodes=max_nodes)
+        if chart.stats is not None:
+            trees = self._timed_trees(trees, chart.stats)
+        return trees
+
+    def _timed_trees(self, trees, stats):
+        """
+        Generate ``trees``, recording the time spent building them in
+        ``stats`` and in the stats of the parser.
+        """
+        total = self._stats
+        while True:
+            start = time.perf_counter()
+            tree = next(trees, None)
+            seconds = time.perf_counter() - start
+            stats.tree_seconds += seconds
+            total.tree_seconds += seconds
+            if tree is None:
+                return
+            stats.trees += 1
+            total.trees += 1
+            yield tree
+
+    def parse_batch(self, sentences, workers=None, chunksize=64, max_trees=1, shared_prefixes=False):
+        """
+        Parse a batch of tokenized sentences with a pool of ``workers``
+        processes. The compiled grammar is sent once to each worker, the
+        sentences are sent by chunks of ``chunksize``, and the results
+        are returned in the order of ``sentences``.
+
+        The result of a sentence is the list of its first ``max_trees``
+        trees (all of them if None), None if the grammar does not cover
+        its words, or the ``BudgetExceeded`` error if its parse was aborted
+        (see the ``timeout`` and ``max_edges`` of the parser).
+
+        When the parser records stats, those of the batch are given by
+        ``BatchResult.stats`` and added to ``Parser.stats``.
+
+        :param workers: The number of processes, ``os.cpu_count()`` if None.
+            With 1 worker, the sentences are parsed in this process.
+        :param shared_prefixes: Parse the sentences in sorted order with an
+            ``IncrementalParse``, going back from the chart of a sentence to
+            the chart of the prefix it shares with the next one instead of
+            starting from an empty chart. The number of edges of the charts
+            and the number of edges which were computed are given by
+            ``BatchResult.edges`` and ``BatchResult.new_edges``.
+        :rtype: BatchResult
+        """
+        sentences = [list(tokens) for tokens in sentences]
+        order = None
+        if shared_prefixes:
+            order = sorted(range(len(sentences)), key=sentences.__getitem__)
+            sentences = [sentences[idx] for idx in order]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(sentences)))
+
+        total_stats = self._stats
+        batch_stats = None if total_stats is None else ParseStats()
+        start = time.perf_counter()
+        if workers == 1:
+            self._stats = batch_stats
+            try:
+                results, edges = _parse_chunk(self, sentences, max_trees, shared_prefixes)
+            finally:
+                self._stats = total_stats
+        else:
+            chunks = [
+                (sentences[idx:idx + chunksize], max_trees, shared_prefixes)
+                for idx in range(0, len(sentences), chunksize)
+            ]
+            initargs = (dumps(self.compiled_grammar()), self._options)
+            results = []
+            edges = (0, 0) if shared_prefixes else None
+            with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+                for chunk_results in pool.imap(_parse_worker_chunk, chunks):
+                    chunk_results, chunk_stats, chunk_edges = pickle.loads(chunk_results)
+                    results += chunk_results
+                    if chunk_stats is not None:
+                        batch_stats.merge(chunk_stats)
+                    if chunk_edges is not None:
+                        edges = (edges[0] + chunk_edges[0], edges[1] + chunk_edges[1])
+
+        if order is not None:
+            sorted_results = results
+            results = [None] * len(sorted_results)
+            for idx, result in zip(order, sorted_results):
+                results[idx] = result
+        if batch_stats is not None:
+            total_stats.merge(batch_stats)
+        return BatchResult(results, workers, time.perf_counter() - start, batch_stats,
+                           *(edges or ()))
+
+
+class IncrementalParse:
+    """
+    The parse of a sentence whose tokens are given one at a time by
+    ``push``. Each token extends the same chart with a leaf, and only the
+    edges ending at the new leaf are added, the edges and indexes of the
+    chart being kept. ``truncate`` goes back to a prefix of the tokens,
+    removing the edges ending after it. The chart after a token has the
+    edges of ``Parser.chart_parse`` for the tokens so far, and its parse
+    trees.
+
+    After each token, the parse tells whether the tokens so far are a
+    viable prefix, i.e. can start a sentence, and whether they are a
+    complete sentence. The viable prefix test looks at the categories of
+    the edges and not at their features: a prefix which is not viable
+    cannot start any sentence, a viable one may still not agree on its
+    features with the rest of every sentence.
+    """
+
+    def __init__(self, parser, trace=None, **budget):
+        self._parser = parser
+        self._trace = parser._trace if trace is None else trace
+        self._budget = budget
+        self._chart = parser._chart_class([])
+        self._chart.unifier = parser._unifier
+        self._chart.incremental = True
+        self._start = parser.grammar().start()
+        self._leftcorners = parser.compiled_grammar().leftcorners
+        # The state after each prefix of the tokens: (number of edges,
+        # categories and words which can start at its end, viable, complete)
+        self._states = [(0, self._starting([symbol_type(self._start)]), True, False)]
+
+    def _starting(self, goals):
+        """
+        Return the categories and words which can start one of ``goals``.
+        """
+        wanted = set()
+        for goal in goals:
+            wanted.update(self._leftcorners.get(goal, (goal,)))
+        return wanted
+
+    def push(self, token, **budget):
+        """
+        Add ``token`` at the end of the sentence, and return whether the
+        tokens so far are a viable prefix, and whether they are complete.
+        ``budget`` overrides the budget of the parse for this token.
+        When an error is raised, the token is not added.
+
+        :rtype: tuple(bool, bool)
+        :raise ValueError: If the grammar does not cover ``token``
+        :raise BudgetExceeded: If the budget of the token is exceeded
+        """
+        parser = self._parser
+        parser.grammar().check_coverage([token])
+        chart = self._chart
+        chart.append_leaf(token)
+        try:
+            parser._fill_chart_with_stats(chart, parser._budget(**dict(self._budget, **budget)),
+                                          self._trace, 1, num_parses=int(chart.num_leaves() == 1))
+        except BudgetExceeded:
+            chart.truncate(chart.num_leaves() - 1, self._states[-1][0])
+            raise
+
+        end = chart.num_leaves()
+        goals = set()
+        viable = False
+        for edge in chart.select(end=end):
+            start = edge.start()
+            if start == end or _category(edge.lhs()) not in self._states[start][1]:
+                continue
+            viable = True
+            if edge.is_incomplete():
+                goals.add(_category(edge.nextsym()))
+        complete = next(chart.spanning_edges(self._start), None) is not None
+        self._states.append((chart.num_edges(), self._starting(goals), viable, complete))
+        return viable, complete
+
+    def truncate(self, num_tokens):
+        """
+        Go back to the first ``num_tokens`` tokens, e.g. when the last
+        ones are erased.
+        """
+        if num_tokens < self._chart.num_leaves():
+            del self._states[num_tokens + 1:]
+            self._chart.truncate(num_tokens, self._states[-1][0])
+
+    def tokens(self):
+        return list(self._chart.leaves())
+
+    def chart(self):
+        return self._chart
+
+    def is_viable(self):
+        """
+        True if the tokens so far can start a sentence.
+        """
+        return self._states[-1][2]
+
+    def is_complete(self):
+        """
+        True if the tokens so far have a parse.
+        """
+        return self._states[-1][3]
+
+    def parses(self, tree_class=Tree, **kwargs):
+        """
+        Return an iterator of the parse trees of the tokens so far, see
+        ``Chart.parses``.
+        """
+        return self._chart.parses(self._start, tree_class=tree_class, **kwargs)
+
+
+def _category(symbol):
+    # The lhs of a leaf edge is its word
+    return symbol if isinstance(symbol, str) else symbol_type(symbol)
+
+
+class BatchResult(list):
+    """
+    The results of ``Parser.parse_batch``, in the order of the sentences,
+    with the throughput of the batch, and its ``ParseStats`` or None.
+    With ``shared_prefixes``, ``edges`` is the number of edges of the
+    charts of the parsed sentences, and ``new_edges`` the number of those
+    which were computed for them, the others being shared with the
+    previous sentence.
+    """
+
+    def __init__(self, results, workers, seconds, stats=None, edges=None, new_edges=None):
+        list.__init__(self, results)
+        self.workers = workers
+        self.seconds = seconds
+        self.stats = stats
+        self.edges = edges
+        self.new_edges = new_edges
+
+    def throughput(self):
+        """
+        Return the number of sentences parsed per second.
+        """
+        return len(self) / self.seconds if self.seconds else float("inf")
+
+    def shared_edges(self):
+        """
+        Return the fraction of the edges of the charts which were shared
+        between sentences, or None without ``shared_prefixes``.
+        """
+        if self.edges is None:
+            return None
+        return 1 - self.new_edges / self.edges if self.edges else 0.0
+
+
+def _parse_chunk(parser, sentences, max_trees, shared_prefixes=False):
+    """
+    Return the results of ``sentences``, and with ``shared_prefixes``, the
+    numbers of edges and new edges of their charts, None otherwise.
+    """
+    if shared_prefixes:
+        return _parse_shared_prefixes(parser, sentences, max_trees)
+    results = []
+    for tokens in sentences:
+        try:
+            trees = parser.parse(tokens, max_trees=max_trees)
+            results.append(list(trees))
+        except ValueError:
+            # The grammar does not cover some of the words.
+            results.append(None)
+        except BudgetExceeded as e:
+            results.append(e)
+    return results, None
+
+
+def _parse_shared_prefixes(parser, sentences, max_trees):
+    """
+    ``_parse_chunk`` for sorted ``sentences``, with a single
+    ``IncrementalParse`` truncated to the prefix shared by consecutive
+    sentences.
+    """
+    results = []
+    edges = new_edges = 0
+    incremental = parser.incremental_parse()
+    chart = incremental.chart()
+    for tokens in sentences:
+        shared = 0
+        for token, previous in zip(tokens, chart.leaves()):
+            if token != previous:
+                break
+            shared += 1
+        try:
+            parser.grammar().check_coverage(tokens)
+        except ValueError:
+            # The grammar does not cover some of the words.
+            results.append(None)
+            continue
+        incremental.truncate(shared)
+        stats = parser.stats()
+        if stats is not None and shared:
+            # The other parses are counted by their first token
+            stats.parses += 1
+
+        # The timeout of the parser is the budget of the whole sentence
+        deadline = None if parser._timeout is None else time.monotonic() + parser._timeout
+        num_edges = chart.num_edges()
+        try:
+            for token in tokens[shared:]:
+                incremental.push(token, deadline=deadline)
+        except BudgetExceeded as e:
+            results.append(e)
+            continue
+        edges += chart.num_edges()
+        new_edges += chart.num_edges() - num_edges
+
+        trees = incremental.parses(max_trees=max_trees)
+        if chart.stats is not None:
+            trees = parser._timed_trees(trees, chart.stats)
+        results.append(list(trees))
+    return results, (edges, new_edges)
+
+
+# The parser of a parse_batch worker process.
+_worker_parser = None
+
+
+def _init_worker(compiled, options):
+    global _worker_parser
+    _worker_parser = Parser(pickle.loads(compiled), **options)
 
-        # Return the final chart.
-        return chart
 
-    def parse(self, tokens, tree_class=Tree):
-        chart = self.chart_parse(tokens)
-        return iter(chart.parses(self._grammar.start(), tree_class=tree_class))
+def _parse_worker_chunk(args):
+    sentences, max_trees, shared_prefixes = args
+    stats = None
+    if _worker_parser.stats() is not None:
+        stats = _worker_parser._stats = ParseStats()
+    results, edges = _parse_chunk(_worker_parser, sentences, max_trees, shared_prefixes)
+    # Feature structures cache their hash, pickle the trees so that it
+    # is not sent back to the parent process.
+    return dumps((results, stats and stats.as_dict(), edges))
@@ -0,0 +1,159 @@
+from nltk.featstruct import FeatStruct, find_variables, TYPE
+from nltk.grammar import is_nonterminal
+from nltk.parse import featurechart
+from nltk.parse.featurechart import FeatureTreeEdge
+from nltk import unify
+
+from compiled_grammar import symbol_type
+
+
+class FeatureFundamentalRule(featurechart.FeatureFundamentalRule):
+    """
+    ``nltk``'s ``FeatureFundamentalRule``, unifying with the
+    ``FeatureUnifier`` of the chart when it has one, and counting its
+    unifications in the ``ParseStats`` of the chart when it has some.
+    """
+
+    def apply(self, chart, grammar, left_edge, right_edge):
+        # Make sure the rule is applicable.
+        if not (
+            left_edge.end() == right_edge.start()
+            and left_edge.is_incomplete()
+            and right_edge.is_complete()
+            and isinstance(left_edge, FeatureTreeEdge)
+        ):
+            return
+        found = right_edge.lhs()
+        nextsym = left_edge.nextsym()
+        if isinstance(right_edge, FeatureTreeEdge):
+            if not is_nonterminal(nextsym):
+                return
+            if nextsym[TYPE] != found[TYPE]:
+                return
+            # Create a copy of the bindings.
+            bindings = left_edge.bindings()
+            unifier = chart.unifier
+            unified = None if unifier is None else unifier.unify(nextsym, found, bindings)
+            if unified is None:
+                # We rename vars here, because we don't want variables
+                # from the two different productions to match.
+                found = found.rename_variables(used_vars=left_edge.variables())
+                # Unify B1 (left_edge.nextsym) with B2 (right_edge.lhs) to
+                # generate B3 (result).
+                unified = unify(nextsym, found, bindings, rename_vars=False) is not None
+            stats = chart.stats
+            if stats is not None:
+                stats.unify_attempts += 1
+                stats.unify_successes += unified
+            if not unified:
+                return
+        else:
+            if nextsym != found:
+                return
+            # Create a copy of the bindings.
+            bindings = left_edge.bindings()
+
+        # Construct the new edge.
+        new_edge = left_edge.move_dot_forward(right_edge.end(), bindings)
+
+        # Add it to the chart, with appropriate child pointers.
+        if chart.insert_with_backpointer(new_edge, left_edge, right_edge):
+            yield new_edge
+
+
+class FeatureSingleEdgeFundamentalRule(featurechart.FeatureSingleEdgeFundamentalRule):
+    """
+    ``nltk``'s ``FeatureSingleEdgeFundamentalRule``, using the
+    ``FeatureFundamentalRule`` above.
+    """
+
+    _fundamental_rule = FeatureFundamentalRule()
+
+
+class FeatureBottomUpPredictCombineRule(featurechart.FeatureBottomUpPredictCombineRule):
+    """
+    ``nltk``'s ``FeatureBottomUpPredictCombineRule``, with the unifier
+    and the stats of the chart like ``FeatureFundamentalRule``.
+    Subclasses can filter the predicted productions with ``_is_viable``.
+    """
+
+    def _is_viable(self, chart, prod, start, end):
+        return True
+
+    def apply(self, chart, grammar, edge):
+        if edge.is_incomplete():
+            return
+        found = edge.lhs()
+        stats = chart.stats
+        unifier = chart.unifier
+        for prod in grammar.productions(rhs=found):
+            if not self._is_viable(chart, prod, edge.start(), edge.end()):
+                chart.count_pruned()
+                continue
+
+            bindings = {}
+            if isinstance(edge, FeatureTreeEdge):
+                _next = prod.rhs()[0]
+                if not is_nonterminal(_next):
+                    continue
+
+                unified = None if unifier is None else unifier.unify(_next, found, bindings)
+                if unified is None:
+                    # We rename vars here, because we don't want variables
+                    # from the two different productions to match.
+                    used_vars = find_variables(
+                        (prod.lhs(),) + prod.rhs(), fs_class=FeatStruct
+                    )
+                    found = found.rename_variables(used_vars=used_vars)
+                    unified = unify(_next, found, bindings, rename_vars=False) is not None
+                if stats is not None:
+                    stats.unify_attempts += 1
+                    stats.unify_successes += unified
+                if not unified:
+                    continue
+
+            new_edge = FeatureTreeEdge.from_production(
+                prod, edge.start()
+            ).move_dot_forward(edge.end(), bindings)
+            if chart.insert(new_edge, (edge,)):
+                yield new_edge
+
+
+class FeatureFilteredBottomUpPredictCombineRule(FeatureBottomUpPredictCombineRule):
+    """
+    ``FeatureBottomUpPredictCombineRule`` with a left-corner filter.
+    A production ``B -> A beta`` is not predicted from a complete edge
+    ``[A][i:j]`` when the new edge can never be part of a spanning parse:
+
+    - ``i == 0`` and ``B`` is not a left corner of the start symbol
+    - ``i > 0`` and ``B`` cannot start a non-first child of any production
+    - ``beta`` is not empty and the word at ``j`` cannot start ``beta[0]``,
+      which is not checked at the end of an incremental chart
+
+    Pruned edges are counted with ``Chart.count_pruned``.
+    """
+
+    def __init__(self, compiled_grammar):
+        self._compiled = compiled_grammar
+        self._start = symbol_type(compiled_grammar.start())
+
+    def _is_viable(self, chart, prod, start, end):
+        compiled = self._compiled
+        cat = symbol_type(prod.lhs())
+        if start == 0:
+            if not compiled.is_leftcorner(self._start, cat):
+                return False
+        elif cat not in compiled.non_initial:
+            return False
+
+        rhs = prod.rhs()
+        if len(rhs) == 1 or compiled.has_empty_productions:
+            return True
+        if end >= chart.num_leaves():
+            # The next word of an incremental chart is not known yet
+            return chart.incremental
+        _next = rhs[1]
+        nexttoken = chart.leaf(end)
+        if is_nonterminal(_next):
+            return compiled.is_leftcorner_word(symbol_type(_next), nexttoken)
+        return _next == nexttoken
@@ -0,0 +1,166 @@
+from nltk import TYPE
+from nltk.featstruct import FeatStruct, FeatureValueTuple, Variable, unify
+
+# The value of a feature which is not in a feature structure
+_ABSENT = object()
+
+
+class FeatureUnifier:
+    """
+    Unification specialised for flat feature grammars such as grammar.fcfg,
+    whose nonterminals only have atomic features (``SEM``, ``TP``...).
+
+    Each nonterminal of the grammar is compiled once into a template: a
+    tuple of ``(slot, atom id, variable)`` entries, one per feature but
+    ``TYPE``, where the features are numbered into slots, the atoms of the
+    grammar are interned to ints, and ``variable`` is None for an atom.
+    Unifying a template with the left-hand side of a complete edge is then
+    a loop over the slots which compares atom ids and binds variables,
+    without renaming variables or copying feature structures.
+
+    Variables are bound in the ``{Variable: value}`` dict of the edge, not
+    by slot index: ``FeatureTreeEdge.move_dot_forward`` substitutes the
+    bindings of that dict into the new edge, and a binding by slot would
+    have to be converted back to it on every combine.
+
+    Anything else (nested feature structures, ``?x + ?y`` values, edges
+    whose features are not ground...) is left to ``nltk.unify``.
+    """
+
+    def __init__(self, grammar):
+        self._grammar = grammar
+        # feature name -> slot
+        self._slots = {}
+        # atom -> atom id
+        self._atom_ids = {}
+        # id(nonterminal) -> template, the nonterminals being kept alive
+        # by the grammar
+        self._templates = {}
+
+        for prod in grammar.productions():
+            for symbol in (prod.lhs(),) + prod.rhs():
+                if isinstance(symbol, FeatStruct):
+                    for feature, value in symbol.items():
+                        if feature == TYPE:
+                            continue
+                        self._slots.setdefault(feature, len(self._slots))
+                        if _is_atom(value):
+                            self._atom_ids.setdefault(value, len(self._atom_ids))
+
+        for prod in grammar.productions():
+            for symbol in (prod.lhs(),) + prod.rhs():
+                if isinstance(symbol, FeatStruct):
+                    self._templates[id(symbol)] = self._compile(symbol)
+
+    def __reduce__(self):
+        # Templates are keyed by object ids, rebuild them after unpickling.
+        return FeatureUnifier, (self._grammar,)
+
+    def _compile(self, symbol):
+        """
+        Return the template of ``symbol``, or None if it cannot be unified
+        by the fast path.
+        """
+        template = []
+        for feature, value in symbol.items():
+            if feature == TYPE:
+                continue
+            slot = self._slots.get(feature)
+            if slot is None:
+                return None
+            if isinstance(value, Variable):
+                template.append((slot, -1, value))
+            elif _is_atom(value) and value in self._atom_ids:
+                template.append((slot, self._atom_ids[value], None))
+            else:
+                return None
+        return tuple(template)
+
+    def template(self, symbol):
+        template = self._templates.get(id(symbol))
+        if template is None and id(symbol) not in self._templates:
+            template = self._compile(symbol)
+        return template
+
+    def _values(self, symbol):
+        """
+        Return the values of the features of a ground ``symbol`` by slot,
+        or None if it cannot be unified by the fast path.
+        """
+        values = [_ABSENT] * len(self._slots)
+        slots = self._slots
+        for feature, value in symbol.items():
+            slot = slots.get(feature)
+            if slot is None:
+                if feature is TYPE or feature == TYPE:
+                    continue
+                return None
+            if not _is_atom(value):
+                return None
+            values[slot] = value
+        return values
+
+    def unify(self, nextsym, found, bindings):
+        """
+        Unify ``nextsym``, a symbol of the right-hand side of a production,
+        with ``found``, the ground left-hand side of a complete edge, and
+        add the new variable bindings to ``bindings``, like
+        ``nltk.unify(nextsym, found, bindings)``.
+
+        :return: True or False, or None if the symbols must be unified by
+            ``nltk.unify``, ``bindings`` being unchanged.
+        """
+        template = self.template(nextsym)
+        if template is None:
+            return None
+        values = self._values(found)
+        if values is None:
+            return None
+
+        atom_ids = self._atom_ids
+        new_bindings = None
+        for slot, atom_id, variable in template:
+            value = values[slot]
+            if value is _ABSENT:
+                continue
+            if variable is None:
+                if atom_ids.get(value, -2) != atom_id:
+                    return False
+                continue
+            bound = bindings.get(variable, _ABSENT)
+            if bound is _ABSENT and new_bindings:
+                bound = new_bindings.get(variable, _ABSENT)
+            if bound is _ABSENT:
+                if new_bindings is None:
+                    new_bindings = {}
+                new_bindings[variable] = value
+            elif not _is_atom(bound):
+                # e.g. a variable bound to another variable
+                return None
+            elif bound != value:
+                return False
+        if new_bindings:
+            bindings.update(new_bindings)
+        return True
+
+    def unifies(self, symbol, start):
+        """
+        True if the left-hand side of a complete edge ``symbol`` unifies
+        with ``start``, like ``nltk.unify(symbol, start, rename_vars=True)``.
+        """
+        result = self.unify(start, symbol, {})
+        if result is None:
+            return unify(symbol, start, rename_vars=True) is not None
+        return result
+
+
+def _is_atom(value):
+    """
+    True for the values which ``nltk.unify`` compares for equality: strings,
+    numbers, and tuples of them.
+    """
+    if isinstance(value, (str, int, float)):
+        return True
+    if type(value) in (tuple, FeatureValueTuple):
+        return all(isinstance(item, (str, int, float)) for item in value)
+    return False
@@ -0,0 +1,98 @@
+"""
+Answer the tour questions from grammar.fcfg and database.txt.
+"""
+import hashlib
+import os
+
+from custom_parser import STATUS_BUDGET_EXCEEDED, BudgetExceeded, Parser
+from query_plan import QueryPlanner
+from tokenizer import Tokenizer
+from tour_database import TourDatabase
+from utils import context_filter
+
+# The root of the repository, whose data files are used by default
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+GRAMMAR_PATH = os.path.join(ROOT, 'grammar.fcfg')
+DATABASE_PATH = os.path.join(ROOT, 'database.txt')
+
+STATUS_OK = "ok"
+STATUS_NO_PARSE = "no_parse"
+STATUS_NOT_COVERED = "not_covered"
+STATUS_NOT_SUITED = "not_suited"
+
+
+class QuestionAnswerer:
+    """
+    The parser, tokenizer, database and query planner of the tour
+    questions, loaded once and used for any number of questions.
+
+    :param cache: A ``ParseCache`` of the ``SEM`` values of the parser
+    :param answer_cache: An ``AnswerCache`` of the answers, keyed by the
+        grammar, the database and the tokens of the questions
+    """
+
+    def __init__(self, grammar_path=GRAMMAR_PATH, database_path=DATABASE_PATH, cache=None,
+                 timeout=None, max_edges=None, answer_cache=None):
+        self.parser = Parser(grammar_path, cache=cache, timeout=timeout, max_edges=max_edges)
+        self.tokenizer = Tokenizer.from_grammar(self.parser.grammar())
+        self.database = TourDatabase.load(database_path)
+        with open(database_path, "rb") as file:
+            self.database_hash = hashlib.sha256(file.read()).hexdigest()
+        self.planner = QueryPlanner()
+        self.answer_cache = answer_cache
+
+    def answer(self, question):
+        """
+        Answer the sentence ``question`` with the first of its parses
+        which can be answered from the database.
+
+        :return: A dict with the ``question``, its ``tokens``, the
+            ``status`` (``ok``, ``no_parse``, ``not_covered``,
+            ``not_suited`` or ``budget_exceeded``), for ``ok`` the ``sem``,
+            ``context`` and ``result`` of the answer, and for
+            ``budget_exceeded`` the statistics of the parse in ``budget``.
+        """
+        tokens = self.tokenizer.tokenize(question)
+        if self.answer_cache is None:
+            return self._answer(question, tokens)
+
+        # The tokens are the normalized question: multiword terminals are
+        # joined whatever the spaces between their words.
+        key = self.answer_cache.key(self.parser.compiled_grammar().grammar_hash,
+                                    self.database_hash, tokens)
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            return dict({"question": question, "tokens": tokens}, **cached)
+        answer = self._answer(question, tokens)
+        # A budget overrun may not happen again
+        if answer["status"] != STATUS_BUDGET_EXCEEDED:
+            self.answer_cache.put(key, {name: answer[name]
+                                        for name in ("status", "sem", "context", "result")})
+        return answer
+
+    def _answer(self, question, tokens):
+        answer = {"question": question, "tokens": tokens, "status": STATUS_NO_PARSE,
+                  "sem": None, "context": None, "result": None}
+        try:
+            sems = self.parser.parse_sems(tokens)
+        except ValueError:
+            # Raised by check_coverage
+            answer["status"] = STATUS_NOT_COVERED
+            return answer
+        except BudgetExceeded as e:
+            answer["status"] = STATUS_BUDGET_EXCEEDED
+            answer["budget"] = e.stats()
+            return answer
+
+        for sem in sems:
+            answer["status"] = STATUS_NOT_SUITED
+            sem = [ele for ele in sem or () if ele != '']
+            try:
+                context = context_filter(sem)
+                result = self.planner.answer(self.database, context)
+            except (IndexError, KeyError):
+                continue
+            answer.update(status=STATUS_OK, sem=sem, context=context, result=result)
+            break
+        return answer
@@ -0,0 +1,244 @@
+"""
+HTTP/JSON question answering service for the tour questions.
+
+The grammar and the database are loaded once in each worker of a
+process pool, and the asyncio server only reads requests and writes
+answers, so that several questions are answered concurrently:
+
+    python -m hcmut.iaslab.nlp.app.service --port 5000
+
+    curl -s localhost:5000/answer -d '{"question": "đi Nha Trang có những ngày nào nhỉ"}'
+
+Routes:
+
+- ``POST /answer`` with ``{"question": "..."}``, or ``GET /answer?q=...``:
+  the answer of ``QuestionAnswerer.answer``
+- ``GET /health``: ``{"status": "ok"}``
+
+The parser modules are the top-level modules of the repository, which
+must be importable, e.g. by running from its root.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from hcmut.iaslab.nlp.app.answerer import DATABASE_PATH, GRAMMAR_PATH, QuestionAnswerer
+from parse_cache import AnswerCache, ParseCache
+
+HOST = "0.0.0.0"
+PORT = 5000
+MAX_BODY_SIZE = 64 * 1024
+READ_TIMEOUT = 30.0
+# Budget of the parse of a question
+PARSE_TIMEOUT = 5.0
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+# The answerer of a worker process
+_answerer = None
+
+
+def _init_worker(grammar_path, database_path, cache_size, timeout, max_edges, answer_cache):
+    global _answerer
+    if answer_cache is not None:
+        answer_cache = AnswerCache(answer_cache)
+    _answerer = QuestionAnswerer(grammar_path, database_path, cache=ParseCache(maxsize=cache_size),
+                                 timeout=timeout, max_edges=max_edges, answer_cache=answer_cache)
+
+
+def _answer(question):
+    return _answerer.answer(question)
+
+
+class QAService:
+    """
+    Answers questions in a pool of ``workers`` processes, each with its
+    own ``QuestionAnswerer`` and parse cache. With ``workers=0``, a single
+    answerer is loaded in this process and used from one thread, which
+    is convenient for tests.
+
+    A question whose parse takes more than ``timeout`` seconds or
+    ``max_edges`` edges is answered with the ``budget_exceeded`` status.
+
+    With ``answer_cache``, the path of an ``AnswerCache`` file, the answers
+    are shared by the workers and kept across restarts.
+    """
+
+    def __init__(self, grammar_path=GRAMMAR_PATH, database_path=DATABASE_PATH, workers=None,
+                 cache_size=1024, timeout=PARSE_TIMEOUT, max_edges=None, answer_cache=None):
+        initargs = (grammar_path, database_path, cache_size, timeout, max_edges, answer_cache)
+        if workers == 0:
+            _init_worker(*initargs)
+            self._executor = ThreadPoolExecutor(1)
+        else:
+            self._executor = ProcessPoolExecutor(workers or os.cpu_count() or 1,
+                                                 initializer=_init_worker, initargs=initargs)
+        self.requests = 0
+
+    async def answer(self, question):
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _answer, question)
+
+    def close(self):
+        self._executor.shutdown()
+
+    # ////////////////////////////////////////////////////////////
+    # HTTP
+    # ////////////////////////////////////////////////////////////
+
+    async def handle(self, method, target, body):
+        """
+        Return the JSON response to a request.
+        """
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            return {"status": "ok", "requests": self.requests}
+        if url.path != "/answer":
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+
+        if method == "GET":
+            question = parse_qs(url.query).get("q", [None])[0]
+        elif method == "POST":
+            try:
+                question = json.loads(body.decode("utf-8")).get("question")
+            except (UnicodeDecodeError, ValueError, AttributeError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object")
+        else:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "No question")
+        return await self.answer(question)
+
+    async def serve_connection(self, reader, writer):
+        """
+        Answer the requests of a connection until the client closes it or
+        sends ``Connection: close``.
+        """
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), READ_TIMEOUT)
+                except HTTPError as e:
+                    await _write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, response = HTTPStatus.OK, await self.handle(method, target, body)
+                except HTTPError as e:
+                    status, response = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {
+                        "error": "%s: %s" % (type(e).__name__, e)}
+                await _write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def _read_request(reader):
+    """
+    Return ``(method, target, headers, body)`` of the next request of
+    ``reader``, or None at the end of the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def _write_response(writer, status, response, keep_alive=True):
+    body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+    head = "HTTP/1.1 %d %s\r\nContent-Type: application/json; charset=utf-8\r\n" \
+           "Content-Length: %d\r\nConnection: %s\r\n\r\n" % (
+               status.value, status.phrase, len(body), "keep-alive" if keep_alive else "close")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def run(host=HOST, port=PORT, workers=None, grammar=GRAMMAR_PATH, database=DATABASE_PATH,
+        cache_size=1024, timeout=PARSE_TIMEOUT, max_edges=None, answer_cache=None, **kwargs):
+    """
+    Entry point of conf/app.json: serve until interrupted.
+    """
+    service = QAService(grammar, database, workers=workers, cache_size=cache_size,
+                        timeout=timeout, max_edges=max_edges, answer_cache=answer_cache)
+    print("Serving on http://%s:%d" % (host, port))
+    try:
+        asyncio.run(service.serve(host, int(port)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default=HOST)
+    arg_parser.add_argument("--port", type=int, default=PORT)
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="number of worker processes, 0 to answer in the server process "
+                                 "(default: the number of CPUs)")
+    arg_parser.add_argument("--grammar", default=GRAMMAR_PATH)
+    arg_parser.add_argument("--database", default=DATABASE_PATH)
+    arg_parser.add_argument("--cache-size", type=int, default=1024,
+                            help="size of the parse cache of each worker")
+    arg_parser.add_argument("--timeout", type=float, default=PARSE_TIMEOUT,
+                            help="maximum number of seconds of the parse of a question")
+    arg_parser.add_argument("--max-edges", type=int, default=None,
+                            help="maximum number of chart edges of the parse of a question")
+    arg_parser.add_argument("--answer-cache", default=None,
+                            help="SQLite file of the answers, shared by the workers and kept "
+                                 "across restarts (see parse_cache.py warm)")
+    args = arg_parser.parse_args()
+    run(args.host, args.port, args.workers, args.grammar, args.database, args.cache_size,
+        args.timeout, args.max_edges, args.answer_cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,42 @@
 import sys
-from nltk import data, CFG, Tree, ChartParser
-from custom_parser import Parser
-from utils import get_all_terminal_nodes, split_tokens
+from nltk import CFG
+from compiled_grammar import load_grammar
+from custom_parser import BudgetExceeded, Parser
+from tokenizer import Tokenizer
+from utils import strip_features
 
 from sentence_generator import generate_sentence
 
-grammar = data.load(resource_url="./p1_grammar.cfg")
+# Read as a feature grammar, so that it can be used by custom_parser.Parser
+compiled_grammar = load_grammar("./p1_grammar.cfg", format="fcfg")
+grammar = compiled_grammar.grammar
 
 if not isinstance(grammar, CFG):
     sys.exit(-1)
 
 # generate_sentence(grammar=grammar)
 
-accepted_tokens = get_all_terminal_nodes(grammar)
-parser = ChartParser(grammar)
+tokenizer = Tokenizer.from_grammar(grammar)
+# Sentences of the generator have up to 30 tokens, do not let one of them stall a worker
+parser = Parser(compiled_grammar, timeout=10.0)
 
 text = "tôi có thể bực"
-with open("./output/parse_results.txt", "+w", encoding="utf-8") as out_file:
+
+if __name__ == "__main__":
     with open("./input/sentences.txt", "r", encoding="utf-8") as in_file:
-        for line in in_file:
-            try:
-                # sentence = in_file.readline()
-                tokens = split_tokens(sentence=line, accepted_tokens=accepted_tokens)
-                result = parser.parse_one(tokens)
-
-                if not isinstance(result, Tree):
-                    out_file.write("()\n")
-                else:
-                    out_file.write(result.pformat(margin=100000) + "\n")
-            except:
+        sentences = [tokenizer.tokenize(line) for line in in_file]
+
+    results = parser.parse_batch(sentences)
+
+    with open("./output/parse_results.txt", "+w", encoding="utf-8") as out_file:
+        for trees in results:
+            if isinstance(trees, BudgetExceeded):
+                print(trees)
                 out_file.write("()\n")
+            elif not trees:
+                out_file.write("()\n")
+            else:
+                out_file.write(strip_features(trees[0]).pformat(margin=100000) + "\n")
+
+    print("Parsed %d sentences in %.3fs (%.1f sentences/s, %d workers)"
+          % (len(results), results.seconds, results.throughput(), results.workers))
@@ -0,0 +1,338 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ParseCache:
+    """
+    A bounded LRU cache of parse results, with an optional time to live.
+    Keys are ``(grammar hash, token tuple)``, so that a cache can be
+    shared by parsers of different grammars. It is safe to use from
+    several threads.
+
+    :param maxsize: The maximum number of entries, the least recently
+        used entry being evicted first.
+    :param ttl: The number of seconds an entry stays valid, or None.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        # key -> (expiry time, value)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(grammar_hash, tokens):
+        return grammar_hash, tuple(tokens)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expiry, value = entry
+            if expiry is not None and expiry <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expiry = None if self._ttl is None else self._clock() + self._ttl
+        with self._lock:
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > self._clock())
+
+    def stats(self):
+        """
+        Return the counters of the cache as a dict.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Changed when the answers stored by AnswerCache change, so that the
+# entries of a previous version are not used.
+ANSWER_CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('bytes', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'bytes';
+END;
+"""
+
+
+class AnswerCache:
+    """
+    A persistent cache of the answers of ``QuestionAnswerer``, in an
+    SQLite file shared by the processes which open it, e.g. the workers
+    of the service, and kept across restarts. Keys are ``(grammar hash,
+    database hash, tokens)``, values are JSON.
+
+    The file is in WAL mode, so that readers are not blocked by a writer.
+    When the keys and values take more than ``max_bytes``, the least
+    recently used entries are evicted, down to 90% of ``max_bytes``. To
+    keep reads from writing, the time of use of an entry is only updated
+    when it is older than ``touch_interval`` seconds.
+
+    A cache which cannot be read or written, e.g. because another process
+    holds the write lock for more than ``timeout`` seconds, is skipped:
+    ``get`` misses, ``put`` does nothing, and ``errors`` is incremented.
+    The time of use is not updated by a ``get`` while another process
+    holds the write lock, so that reads never wait for it.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, touch_interval=60.0, timeout=5.0):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._touch_interval = touch_interval
+        self._timeout = timeout
+        self._init_connections()
+        self._connection().executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _init_connections(self):
+        # A connection by thread, and by process: connections cannot be
+        # used after a fork.
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_connections()
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            self._init_connections()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=self._timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def key(grammar_hash, database_hash, tokens):
+        return json.dumps([ANSWER_CACHE_VERSION, grammar_hash, database_hash, list(tokens)],
+                          ensure_ascii=False)
+
+    def get(self, key, default=None):
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT value, last_used FROM entries WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+        except sqlite3.Error:
+            self.errors += 1
+            self.misses += 1
+            return default
+        value, last_used = row
+        now = time.time()
+        if now - last_used > self._touch_interval:
+            self._touch(connection, key, now)
+        self.hits += 1
+        return json.loads(value)
+
+    def _touch(self, connection, key, now):
+        """
+        Update the time of use of ``key`` if the write lock is free: a
+        read does not wait for a writer, and the entry is touched again
+        by a later read.
+        """
+        try:
+            connection.execute("PRAGMA busy_timeout = 0")
+            try:
+                connection.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            finally:
+                connection.execute("PRAGMA busy_timeout = %d" % int(self._timeout * 1000))
+        except sqlite3.Error:
+            pass
+
+    def put(self, key, value):
+        value = json.dumps(value, ensure_ascii=False)
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "value = excluded.value, size = excluded.size, last_used = excluded.last_used",
+                    (key, value, size, time.time()))
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self, connection):
+        """
+        Evict the least recently used entries while the cache takes more
+        than ``max_bytes``.
+        """
+        size = self._size(connection)
+        if size <= self._max_bytes:
+            return
+        target = self._max_bytes * 0.9
+        rows = connection.execute("SELECT key, size FROM entries ORDER BY last_used")
+        keys = []
+        for key, entry_size in rows:
+            if size <= target:
+                break
+            keys.append((key,))
+            size -= entry_size
+        rows.close()
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self.evictions += len(keys)
+
+    def _size(self, connection):
+        return connection.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+
+    def clear(self):
+        self._connection().execute("DELETE FROM entries")
+
+    def close(self):
+        """
+        Close the connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key):
+        return self._connection().execute("SELECT 1 FROM entries WHERE key = ?",
+                                          (key,)).fetchone() is not None
+
+    def stats(self):
+        """
+        Return the counters of the cache as a dict, those of the entries
+        being shared by all the processes.
+        """
+        connection = self._connection()
+        return {
+            "size": len(self),
+            "bytes": self._size(connection),
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+
+def read_questions(path):
+    """
+    Generate the questions of a query log: a question by line, or JSON
+    lines with a ``question``, such as the requests of the service.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("{"):
+                line = json.loads(line).get("question") or ""
+            if line:
+                yield line
+
+
+def main():
+    import argparse
+    from hcmut.iaslab.nlp.app.answerer import DATABASE_PATH, GRAMMAR_PATH, QuestionAnswerer
+
+    arg_parser = argparse.ArgumentParser(
+        description="Manage the persistent answer cache, e.g. pre-populate it from a query log: "
+                    "python parse_cache.py answers.sqlite warm queries.log")
+    arg_parser.add_argument("cache", help="SQLite file of the cache")
+    arg_parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    warm = commands.add_parser("warm", help="answer the questions of a query log")
+    warm.add_argument("log", help="a question by line, or JSON lines with a question")
+    warm.add_argument("--grammar", default=GRAMMAR_PATH)
+    warm.add_argument("--database", default=DATABASE_PATH)
+    commands.add_parser("stats", help="print the size of the cache")
+    commands.add_parser("clear", help="remove all the entries")
+    args = arg_parser.parse_args()
+
+    cache = AnswerCache(args.cache, max_bytes=args.max_bytes)
+    if args.command == "warm":
+        answerer = QuestionAnswerer(args.grammar, args.database, answer_cache=cache)
+        statuses = {}
+        for question in read_questions(args.log):
+            status = answerer.answer(question)["status"]
+            statuses[status] = statuses.get(status, 0) + 1
+        print(json.dumps({"statuses": statuses, "cache": cache.stats()}))
+    elif args.command == "stats":
+        print(json.dumps(cache.stats()))
+    else:
+        cache.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import json
+
+
+class ParseStats:
+    """
+    Counters of the chart parser, for one parse or aggregated over many
+    with ``merge``. They are recorded only when the parser is built with
+    ``stats=True``; otherwise ``Chart.stats`` is None and each hook costs
+    one ``is None`` test.
+
+    - ``parses``, ``tokens``: the parsed sentences and their tokens
+    - ``edges``, ``pruned``: the final chart sizes, and the edges the
+      rules decided not to insert
+    - ``rule_edges``: the new edges produced by each rule, by rule name
+    - ``unify_attempts``, ``unify_successes``: the feature unifications of
+      the fundamental and bottom-up predict rules
+    - ``select_calls``, ``index_builds``: the calls of ``Chart.select``,
+      and those which had to build a new index (the others are hits)
+    - ``parse_seconds``: the time spent in ``Parser.chart_parse``
+    - ``trees``, ``tree_seconds``: the trees extracted from the charts,
+      and the time spent building them
+    - ``budget_exceeded``: the parses aborted by their budget
+    """
+
+    _COUNTERS = ("parses", "tokens", "edges", "pruned", "unify_attempts", "unify_successes",
+                 "select_calls", "index_builds", "trees", "budget_exceeded")
+    _TIMERS = ("parse_seconds", "tree_seconds")
+
+    def __init__(self):
+        for name in self._COUNTERS:
+            setattr(self, name, 0)
+        for name in self._TIMERS:
+            setattr(self, name, 0.0)
+        self.rule_edges = {}
+
+    def count_rule_edges(self, rule, count):
+        name = type(rule).__name__
+        self.rule_edges[name] = self.rule_edges.get(name, 0) + count
+
+    def index_hits(self):
+        return self.select_calls - self.index_builds
+
+    def merge(self, other):
+        """
+        Add the counters of ``other``, a ``ParseStats`` or the dict of
+        ``as_dict``, to this one.
+        """
+        if isinstance(other, ParseStats):
+            other = other.as_dict()
+        for name in self._COUNTERS + self._TIMERS:
+            setattr(self, name, getattr(self, name) + other[name])
+        for name, count in other["rule_edges"].items():
+            self.rule_edges[name] = self.rule_edges.get(name, 0) + count
+        return self
+
+    def as_dict(self):
+        stats = {name: getattr(self, name) for name in self._COUNTERS + self._TIMERS}
+        stats["index_hits"] = self.index_hits()
+        stats["rule_edges"] = dict(self.rule_edges)
+        return stats
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent, sort_keys=True)
+
+    def __repr__(self):
+        return "ParseStats(parses=%d, edges=%d, unify=%d/%d, seconds=%.3f)" % (
+            self.parses, self.edges, self.unify_successes, self.unify_attempts,
+            self.parse_seconds)
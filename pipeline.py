@@ -0,0 +1,218 @@
+"""
+Streaming parse pipeline: read -> tokenize -> parse -> serialize.
+
+Each stage is a generator running in its own thread, connected to the
+next one by a bounded queue, so memory does not depend on the size of
+the input file. Results are written as JSON lines:
+
+    {"offset": 0, "next_offset": 24, "text": "...", "tokens": [...],
+     "status": "ok", "error": null, "tree": "(S ...)", "parse_ms": 0.8}
+
+``status`` is one of ``ok``, ``no_parse`` (the words are covered but no
+tree spans the sentence), ``not_covered`` (some words are not in the
+grammar), ``budget_exceeded`` (the parse went past the ``--timeout`` or
+``--max-edges`` of the parser, ``budget`` then gives the statistics of
+the aborted parse) or ``error``. ``offset`` / ``next_offset`` are byte offsets in
+the input file, so that a run can be resumed where it stopped:
+
+    python pipeline.py output/samples.txt output/samples.jsonl --resume
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from compiled_grammar import load_grammar
+from custom_parser import STATUS_BUDGET_EXCEEDED, BudgetExceeded, Parser
+from tokenizer import Tokenizer
+from utils import strip_features
+
+STATUS_OK = "ok"
+STATUS_NO_PARSE = "no_parse"
+STATUS_NOT_COVERED = "not_covered"
+STATUS_ERROR = "error"
+
+QUEUE_SIZE = 256
+
+_DONE = object()
+
+
+def read_lines(path, offset=0):
+    """
+    Generate a record for each line of ``path``, starting at the byte
+    ``offset``, which must be the start of a line.
+    """
+    with open(path, "rb") as file:
+        file.seek(offset)
+        for line in file:
+            next_offset = offset + len(line)
+            yield {
+                "offset": offset,
+                "next_offset": next_offset,
+                "text": line.decode("utf-8").strip(),
+            }
+            offset = next_offset
+
+
+def tokenize(records, tokenizer):
+    for record in records:
+        record["tokens"] = tokenizer.tokenize(record["text"])
+        yield record
+
+
+def parse(records, parser, tree_format=str):
+    """
+    Parse the tokens of each record, and record the status, the error,
+    the first tree formatted by ``tree_format`` and the parse time.
+    """
+    for record in records:
+        record["status"] = STATUS_OK
+        record["error"] = None
+        record["tree"] = None
+        start = time.perf_counter()
+        try:
+            tree = next(parser.parse(record["tokens"]), None)
+            if tree is None:
+                record["status"] = STATUS_NO_PARSE
+            else:
+                record["tree"] = tree_format(tree)
+        except ValueError as e:
+            # Raised by check_coverage
+            record["status"] = STATUS_NOT_COVERED
+            record["error"] = str(e)
+        except BudgetExceeded as e:
+            record["status"] = STATUS_BUDGET_EXCEEDED
+            record["error"] = str(e)
+            record["budget"] = e.stats()
+        except Exception as e:
+            record["status"] = STATUS_ERROR
+            record["error"] = "%s: %s" % (type(e).__name__, e)
+        record["parse_ms"] = round(1000 * (time.perf_counter() - start), 3)
+        yield record
+
+
+def serialize(record):
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def buffered(records, maxsize=QUEUE_SIZE):
+    """
+    Run the generator ``records`` in a thread, and return a generator of
+    its items through a queue of at most ``maxsize`` items. An exception
+    raised by ``records`` is raised again by the returned generator.
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for record in records:
+                while not stop.is_set():
+                    try:
+                        items.put(record, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            items.put(_DONE)
+        except BaseException as e:
+            items.put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def resume_offset(out_path):
+    """
+    Return the input offset where a previous run writing ``out_path``
+    stopped, after removing a partially written last line.
+    """
+    if not os.path.exists(out_path):
+        return 0
+    offset = 0
+    with open(out_path, "rb+") as file:
+        valid_size = 0
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            offset = json.loads(line)["next_offset"]
+            valid_size += len(line)
+        file.truncate(valid_size)
+    return offset
+
+
+def run_pipeline(in_path, out_path, parser, tokenizer, offset=0, resume=False,
+                 tree_format=str, queue_size=QUEUE_SIZE):
+    """
+    Parse every line of ``in_path`` from the byte ``offset`` and write the
+    results to ``out_path`` as JSON lines. With ``resume``, start where
+    the results already in ``out_path`` stop, and append to it.
+
+    :return: The number of lines parsed by each status.
+    """
+    if resume:
+        offset = resume_offset(out_path)
+
+    records = read_lines(in_path, offset)
+    records = buffered(tokenize(records, tokenizer), queue_size)
+    records = buffered(parse(records, parser, tree_format), queue_size)
+
+    counts = {}
+    with open(out_path, "a" if resume else "w", encoding="utf-8") as out_file:
+        for record in records:
+            out_file.write(serialize(record))
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+    return counts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--grammar", default="./p1_grammar.cfg")
+    arg_parser.add_argument("--format", default="fcfg",
+                            help="grammar format, the parser needs a feature grammar (default: fcfg)")
+    arg_parser.add_argument("--offset", type=int, default=0,
+                            help="byte offset of the first line to parse")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="continue a previous run, appending to the output")
+    arg_parser.add_argument("--timeout", type=float, default=None,
+                            help="maximum number of seconds of the parse of a line")
+    arg_parser.add_argument("--max-edges", type=int, default=None,
+                            help="maximum number of chart edges of the parse of a line")
+    arg_parser.add_argument("--stats", metavar="PATH", default=None,
+                            help="write the parser statistics of the run to PATH as JSON")
+    args = arg_parser.parse_args()
+
+    compiled_grammar = load_grammar(args.grammar, format=args.format)
+    parser = Parser(compiled_grammar, timeout=args.timeout, max_edges=args.max_edges,
+                    stats=args.stats is not None)
+    tokenizer = Tokenizer.from_grammar(compiled_grammar.grammar)
+
+    def tree_format(tree):
+        return strip_features(tree).pformat(margin=100000)
+
+    counts = run_pipeline(args.input, args.output, parser, tokenizer, offset=args.offset,
+                          resume=args.resume, tree_format=tree_format)
+    print(json.dumps(counts))
+    if args.stats is not None:
+        with open(args.stats, "w", encoding="utf-8") as stats_file:
+            stats_file.write(parser.stats().to_json(indent=2) + "\n")
+
+
+if __name__ == '__main__':
+    main()
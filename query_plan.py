@@ -0,0 +1,161 @@
+import threading
+import time
+
+
+class LatencyHistogram:
+    """
+    Execution times in power-of-two buckets of microseconds: bucket ``i``
+    counts the times in ``[2**(i-1), 2**i)`` us, bucket 0 those under 1 us.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        bucket = int(seconds * 1e6).bit_length()
+        with self._lock:
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total += seconds
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_us": 1e6 * self.total / self.count if self.count else 0.0,
+            "buckets_us": {
+                "<%d" % (1 << bucket): count for bucket, count in sorted(self.buckets.items())
+            },
+        }
+
+
+# Any topic
+ANY = "*"
+
+# Questions and topics of context_filter -> (relation, method, index)
+# The method of ``TourDatabase`` answers the question from the places of
+# the index: ``route``, ``from``, ``to`` or ``all`` as the context allows
+# if the index is None, or ``tour`` for the destination only.
+_OPERATIONS = {
+    ("How_long", ANY): ("RUN-TIME", "run_times", None),
+    ("How_many", ANY): ("DTIME", "count_departures", None),
+    ("What", "date"): ("DTIME", "departure_dates", None),
+    ("What", "vehicle"): ("BY", "vehicle", "tour"),
+    ("What", None): ("ATIME", "arrivals", "all"),
+}
+
+
+class QueryPlan:
+    """
+    How to answer one shape of question, i.e. a question, a topic, and
+    whether the origin and the destination are known:
+
+    - ``relation``: the relation of ``TourDatabase`` which is read
+    - ``method``: the method of ``TourDatabase`` which answers
+    - ``index``: the places given to ``method``, ``route``, ``from``,
+      ``to`` or ``all``, ``tour`` for the destination only, or ``none``
+      when the context lacks a place the method needs, e.g. a vehicle
+      question without a destination: executing the plan raises KeyError
+
+    A plan records the time of its executions in ``histogram``.
+    """
+
+    def __init__(self, shape, relation, method, index):
+        self.shape = shape
+        self.relation = relation
+        self.method = method
+        self.index = index
+        self.histogram = LatencyHistogram()
+
+    def __repr__(self):
+        return "QueryPlan(%s: %s by %s -> %s)" % (
+            "/".join(str(part) for part in self.shape), self.relation, self.index, self.method)
+
+    def _arguments(self, context):
+        if self.index == "tour":
+            return (context["To"],)
+        _from = context["From"] if self.index in ("route", "from") else None
+        to = context["To"] if self.index in ("route", "to") else None
+        return (_from, to)
+
+    def execute(self, database, context):
+        start = time.perf_counter()
+        try:
+            if self.index == "none":
+                raise KeyError("No %s for %r" % (self.relation, context))
+            return getattr(database, self.method)(*self._arguments(context))
+        finally:
+            self.histogram.record(time.perf_counter() - start)
+
+
+class QueryPlanner:
+    """
+    Turn the context of a question (see ``utils.context_filter``) into a
+    ``QueryPlan``. Plans are cached by question shape, so that a shape is
+    only planned once.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shape(context):
+        return (context["Question"], context["Topic"],
+                context["From"] is not None, context["To"] is not None)
+
+    def plan(self, context):
+        """
+        Return the plan of the shape of ``context``, or None if the
+        question cannot be answered from the database.
+        """
+        shape = self.shape(context)
+        try:
+            return self._plans[shape]
+        except KeyError:
+            pass
+        plan = self._make_plan(shape)
+        with self._lock:
+            return self._plans.setdefault(shape, plan)
+
+    @staticmethod
+    def _make_plan(shape):
+        question, topic, has_from, has_to = shape
+        operation = _OPERATIONS.get((question, topic)) or _OPERATIONS.get((question, ANY))
+        if operation is None:
+            return None
+        relation, method, index = operation
+
+        if index == "tour" and not has_to:
+            index = "none"
+        elif index is None:
+            if has_from and has_to:
+                index = "route"
+            elif has_from:
+                index = "from"
+            elif has_to:
+                index = "to"
+            else:
+                index = "all"
+        return QueryPlan(shape, relation, method, index)
+
+    def answer(self, database, context):
+        """
+        Return the answer to the question of ``context``, or None if it
+        has no plan.
+        """
+        plan = self.plan(context)
+        if plan is None:
+            return None
+        return plan.execute(database, context)
+
+    def plans(self):
+        return [plan for plan in self._plans.values() if plan is not None]
+
+    def stats(self):
+        """
+        Return the execution time histogram of each plan.
+        """
+        return {repr(plan): plan.histogram.as_dict() for plan in self.plans()}
@@ -1,11 +1,43 @@
+"""
+Generate random sentences of a CFG, e.g. the 10k samples of p1_grammar.cfg:
+
+    python sentence_generator.py --count 10000 --seed 1 --output output/samples.txt
+
+Sentences are expanded with an explicit stack, and a derivation is
+abandoned as soon as it cannot give a sentence of at most ``--max-length``
+words. Unique sentences are written to the output as they are found.
+With ``--workers``, candidates are generated by a pool of processes, by
+chunks whose random generators are derived from ``--seed``. For a given
+seed, the output is the same whatever the number of workers.
+
+``--mode enumerate`` writes every sentence of at most ``--max-length``
+(or exactly ``--length``) words, and ``--mode uniform`` draws derivations
+uniformly among those of these lengths, both from the numbers of
+derivations of each symbol by length; ``--counts`` prints these numbers.
+They also work on feature grammars:
+
+    python sentence_generator.py --grammar grammar.fcfg --mode uniform --length 6
+"""
+import argparse
+import hashlib
+import os
 import random
-from nltk import data, CFG, Production
 import sys
+from multiprocessing import Pool
+
+from nltk import CFG, TYPE
+from nltk.grammar import FeatureGrammar
+from nltk.featstruct import FeatStruct
+
+from compiled_grammar import load_grammar, symbol_type
 
 MAX_DEPTH = 30
 NUMBER_OF_SENTENCES = 10000
 INFINITE_LOOP_COUNT = 1000000
 
+# Candidate sentences generated by a task of the pool
+CHUNK_SIZE = 5000
+
 
 def print_to_file(generated_sentences, filename):
     with open(filename, "+w", encoding='utf-8') as file:
@@ -13,41 +45,466 @@ def print_to_file(generated_sentences, filename):
             file.write(sentence + "\n")
 
 
-def create_sentence(start, grammar: CFG):
-    created_string = []
-
-    def dfs(root):
-        prod = random.choice(grammar.productions(lhs=root))
-        if not isinstance(prod, Production):
-            return ""
-        else:
-            for ele in list(prod.rhs()):
-                if isinstance(ele, str):
-                    created_string.append(ele)
+class SentenceGenerator:
+    """
+    Random derivations of a CFG, the productions of a nonterminal being
+    chosen uniformly.
+
+    :param max_length: The maximum number of words of a sentence, a
+        multiword terminal such as 'nhu cầu' counting for its words
+    """
+
+    def __init__(self, grammar: CFG, max_length=MAX_DEPTH):
+        self._grammar = grammar
+        self._max_length = max_length
+        # nonterminal -> productions
+        self._productions = {}
+        for prod in grammar.productions():
+            self._productions.setdefault(prod.lhs(), []).append(prod)
+        self._min_lengths = self._compute_min_lengths()
+
+    def _compute_min_lengths(self):
+        """
+        Return the minimal number of words of each nonterminal, to know
+        during the expansion when a sentence can no longer be short enough.
+        """
+        min_lengths = {}
+        changed = True
+        while changed:
+            changed = False
+            for lhs, prods in self._productions.items():
+                for prod in prods:
+                    length = 0
+                    for sym in prod.rhs():
+                        if isinstance(sym, str):
+                            length += len(sym.split())
+                        elif sym in min_lengths:
+                            length += min_lengths[sym]
+                        else:
+                            break
+                    else:
+                        if length < min_lengths.get(lhs, float("inf")):
+                            min_lengths[lhs] = length
+                            changed = True
+        return min_lengths
+
+    def sentence(self, rng=random, start=None):
+        """
+        Return a random sentence, or None if the derivation was abandoned
+        because it would have more than ``max_length`` words.
+        """
+        if start is None:
+            start = self._grammar.start()
+        productions = self._productions
+        min_lengths = self._min_lengths
+        max_length = self._max_length
+
+        words = []
+        length = 0
+        # The symbols still to expand, the next one on top, and the
+        # minimal number of words they will add.
+        stack = [start]
+        pending = min_lengths.get(start, 0)
+        while stack:
+            sym = stack.pop()
+            if isinstance(sym, str):
+                words.append(sym)
+                length += len(sym.split())
+                pending -= len(sym.split())
+                continue
+            prods = productions.get(sym)
+            if not prods:
+                return None
+            prod = rng.choice(prods)
+            rhs = prod.rhs()
+            pending -= min_lengths.get(sym, 0)
+            for child in rhs:
+                pending += len(child.split()) if isinstance(child, str) else min_lengths.get(child, 0)
+            if length + pending > max_length:
+                return None
+            stack.extend(reversed(rhs))
+        return " ".join(words)
+
+    def chunk(self, seed, index, size=CHUNK_SIZE):
+        """
+        Return the unique sentences among ``size`` random derivations,
+        whose random generator depends on ``seed`` and ``index`` only.
+        """
+        rng = random.Random("%s:%d" % (seed, index))
+        sentences = []
+        seen = set()
+        for _ in range(size):
+            sentence = self.sentence(rng)
+            if sentence is not None and sentence not in seen:
+                seen.add(sentence)
+                sentences.append(sentence)
+        return sentences
+
+
+def _words(terminal):
+    return len(terminal.split())
+
+
+class SentenceEnumerator:
+    """
+    Count, enumerate and uniformly sample the derivations of a grammar by
+    their number of words, without rejection. ``count(n, symbol)``, the
+    number of derivations of ``n`` words from ``symbol``, is computed by
+    dynamic programming for every ``n`` up to ``max_length``.
+
+    Counts are numbers of derivations: a sentence with several parse trees
+    is counted and enumerated once per tree, and the sampling is uniform
+    over the derivations.
+
+    For a feature grammar, a symbol of a right-hand side is expanded with
+    the productions whose left-hand side has the same category and agrees
+    with its atomic features, e.g. ``Wh[TP='left']``. Variables shared
+    between symbols are not checked, which is exact for grammar.fcfg.
+    """
+
+    def __init__(self, grammar, max_length=MAX_DEPTH):
+        self._grammar = grammar
+        self._max_length = max_length
+        self._start = self._key(grammar.start())
+
+        # key -> right-hand sides, as tuples of keys and terminals
+        self._expansions = {}
+        keys = [self._start]
+        while keys:
+            key = keys.pop()
+            if key in self._expansions:
+                continue
+            self._expansions[key] = expansions = []
+            for prod in self._productions(key):
+                rhs = tuple(sym if isinstance(sym, str) else self._key(sym) for sym in prod.rhs())
+                expansions.append(rhs)
+                keys.extend(sym for sym in rhs if not isinstance(sym, str))
+
+        # key -> number of derivations by length
+        self._counts = {key: [] for key in self._expansions}
+        # rhs -> prefix counts: prefixes[rhs][j][n] derivations of n words
+        # from rhs[:j]
+        self._prefixes = {rhs: [[1]] + [[] for _ in rhs]
+                          for expansions in self._expansions.values() for rhs in expansions}
+        for length in range(max_length + 1):
+            self._count_length(length)
+
+    def _key(self, symbol):
+        """
+        Return the key of a nonterminal: itself for a plain CFG, its
+        category and atomic features for a feature grammar.
+        """
+        if not isinstance(symbol, FeatStruct):
+            return symbol
+        features = tuple(sorted((feature, value) for feature, value in symbol.items()
+                                if feature != TYPE and isinstance(value, (str, int))))
+        return symbol_type(symbol), features
+
+    def _productions(self, key):
+        if not isinstance(key, tuple):
+            return self._grammar.productions(lhs=key)
+        category, features = key
+        productions = []
+        for prod in self._grammar.productions():
+            lhs = prod.lhs()
+            if symbol_type(lhs) != category:
+                continue
+            if all(not isinstance(lhs.get(feature), (str, int)) or lhs.get(feature) == value
+                   for feature, value in features):
+                productions.append(prod)
+        return productions
+
+    def _symbol_count(self, symbol, length):
+        if isinstance(symbol, str):
+            return 1 if _words(symbol) == length else 0
+        counts = self._counts[symbol]
+        return counts[length] if length < len(counts) else 0
+
+    def _prefix_count(self, rhs, j, length):
+        prefix = self._prefixes[rhs][j - 1]
+        symbol = rhs[j - 1]
+        return sum(prefix[length - m] * self._symbol_count(symbol, m)
+                   for m in range(length + 1) if prefix[length - m])
+
+    def _count_length(self, length):
+        """
+        Compute the counts of ``length`` words. Unit and empty productions
+        make counts of a length depend on each other, so they are iterated
+        to a fixed point.
+        """
+        for counts in self._counts.values():
+            counts.append(0)
+        for prefixes in self._prefixes.values():
+            for prefix in prefixes[1:]:
+                prefix.append(0)
+            if length:
+                prefixes[0].append(0)
+
+        for _ in range(len(self._counts) + 1):
+            changed = False
+            for rhs, prefixes in self._prefixes.items():
+                for j in range(1, len(rhs) + 1):
+                    prefixes[j][length] = self._prefix_count(rhs, j, length)
+            for key, expansions in self._expansions.items():
+                count = sum(self._prefixes[rhs][-1][length] for rhs in expansions)
+                if count != self._counts[key][length]:
+                    self._counts[key][length] = count
+                    changed = True
+            if not changed:
+                return
+        raise ValueError("The grammar has infinitely many derivations of %d words" % length)
+
+    def count(self, length, symbol=None):
+        """
+        Return the number of derivations of ``length`` words from
+        ``symbol``, the start symbol by default.
+        """
+        if length > self._max_length:
+            raise ValueError("Counts are computed up to %d words" % self._max_length)
+        key = self._start if symbol is None else self._key(symbol)
+        return self._counts[key][length]
+
+    def counts(self):
+        """
+        Return the number of derivations of the start symbol by length.
+        """
+        return list(self._counts[self._start])
+
+    def _sequences(self, rhs, j, length):
+        """
+        Yield the word lists derived by ``rhs[:j]`` in ``length`` words.
+        """
+        if j == 0:
+            if length == 0:
+                yield []
+            return
+        prefix = self._prefixes[rhs][j - 1]
+        symbol = rhs[j - 1]
+        for m in range(length + 1):
+            if not prefix[length - m] or not self._symbol_count(symbol, m):
+                continue
+            for left in self._sequences(rhs, j - 1, length - m):
+                if isinstance(symbol, str):
+                    yield left + [symbol]
                 else:
-                    dfs(ele)
+                    for right in self._derivations(symbol, m):
+                        yield left + right
 
-    dfs(start)
-    return " ".join(created_string)
+    def _derivations(self, key, length):
+        for rhs in self._expansions[key]:
+            if self._prefixes[rhs][-1][length]:
+                yield from self._sequences(rhs, len(rhs), length)
 
+    def sentences(self, length):
+        """
+        Yield the sentence of every derivation of ``length`` words.
+        """
+        self.count(length)
+        for words in self._derivations(self._start, length):
+            yield " ".join(words)
 
-def generate_sentence(grammar: CFG):
-    try:
-        generated_sentences = []
-        for i in range(0, INFINITE_LOOP_COUNT):
-            sentence = create_sentence(grammar.start(), grammar)
-            if len(sentence.split()) > MAX_DEPTH:
+    def sample(self, length, rng=random):
+        """
+        Return the sentence of a derivation of ``length`` words drawn
+        uniformly, or None if there is none.
+        """
+        if not self.count(length):
+            return None
+        words = []
+        # (symbol, length) still to expand, the next one on top
+        stack = [(self._start, length)]
+        while stack:
+            symbol, length = stack.pop()
+            if isinstance(symbol, str):
+                words.append(symbol)
                 continue
-            if len(generated_sentences) >= NUMBER_OF_SENTENCES:
-                break
-            print(sentence)
+            expansions = self._expansions[symbol]
+            rhs = rng.choices(expansions, [self._prefixes[rhs][-1][length] for rhs in expansions])[0]
+            # Split the length between the symbols, from the last one
+            children = []
+            for j in range(len(rhs), 0, -1):
+                prefix = self._prefixes[rhs][j - 1]
+                weights = [prefix[length - m] * self._symbol_count(rhs[j - 1], m)
+                           for m in range(length + 1)]
+                m = rng.choices(range(length + 1), weights)[0]
+                children.append((rhs[j - 1], m))
+                length -= m
+            stack.extend(children)
+        return " ".join(words)
+
+
+def _digest(sentence):
+    # 8 bytes are enough for millions of sentences, and much smaller
+    # than the sentences themselves.
+    return hashlib.blake2b(sentence.encode("utf-8"), digest_size=8).digest()
+
+
+# The generator of a worker process
+_worker_generator = None
+
+
+def _init_worker(grammar, max_length):
+    global _worker_generator
+    _worker_generator = SentenceGenerator(grammar, max_length)
+
+
+def _worker_chunk(args):
+    return _worker_generator.chunk(*args)
+
+
+def generate_sentences(grammar: CFG, count=NUMBER_OF_SENTENCES, seed=None, max_length=MAX_DEPTH,
+                       max_attempts=INFINITE_LOOP_COUNT, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Generate up to ``count`` unique random sentences of ``grammar``, from
+    at most ``max_attempts`` derivations.
+
+    :param seed: The seed of the random generators, a random one if None
+    :param workers: The number of processes generating the candidates
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    num_chunks = max(1, -(-max_attempts // chunk_size))
+    tasks = ((seed, index, chunk_size) for index in range(num_chunks))
+
+    if workers > 1:
+        pool = Pool(workers, initializer=_init_worker, initargs=(grammar, max_length))
+        chunks = pool.imap(_worker_chunk, tasks)
+    else:
+        pool = None
+        generator = SentenceGenerator(grammar, max_length)
+        chunks = (generator.chunk(*task) for task in tasks)
+
+    try:
+        yield from unique_sentences((sentence for sentences in chunks for sentence in sentences), count)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def enumerate_sentences(grammar, lengths, count=None):
+    """
+    Generate the unique sentences of ``grammar`` of the given lengths in
+    words, up to ``count`` of them, from the shortest ones.
+    """
+    enumerator = SentenceEnumerator(grammar, max(lengths))
+    sentences = (sentence for length in sorted(lengths) for sentence in enumerator.sentences(length))
+    return unique_sentences(sentences, count)
+
+
+def sample_sentences(grammar, lengths, count=NUMBER_OF_SENTENCES, seed=None,
+                     max_attempts=INFINITE_LOOP_COUNT):
+    """
+    Generate up to ``count`` unique sentences of ``grammar`` of the given
+    lengths in words, from at most ``max_attempts`` derivations drawn
+    uniformly among the derivations of these lengths.
+    """
+    enumerator = SentenceEnumerator(grammar, max(lengths))
+    lengths = sorted(lengths)
+    weights = [enumerator.count(length) for length in lengths]
+    if not any(weights):
+        return
+    rng = random.Random(seed)
+    sentences = (enumerator.sample(rng.choices(lengths, weights)[0], rng) for _ in range(max_attempts))
+    yield from unique_sentences(sentences, count)
+
+
+def unique_sentences(sentences, count=None):
+    """
+    Generate the first ``count`` unique ``sentences``, all of them if
+    ``count`` is None. Sentences are deduplicated by 8-byte hashes.
+    """
+    if count is not None and count <= 0:
+        return
+    seen = set()
+    for sentence in sentences:
+        digest = _digest(sentence)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield sentence
+        if count is not None and len(seen) >= count:
+            return
+
+
+def write_sentences(sentences, filename):
+    """
+    Write ``sentences`` to ``filename`` as they are generated, and return
+    their number.
+    """
+    count = 0
+    with open(filename, "w", encoding="utf-8") as file:
+        for sentence in sentences:
+            file.write(sentence + "\n")
+            count += 1
+    return count
+
+
+def create_sentence(start, grammar: CFG):
+    sentence = SentenceGenerator(grammar, max_length=INFINITE_LOOP_COUNT).sentence(start=start)
+    return "" if sentence is None else sentence
+
+
+def generate_sentence(grammar: CFG, seed=None, workers=1):
+    count = write_sentences(generate_sentences(grammar, seed=seed, workers=workers),
+                            "output/samples.txt")
+    print("Count", count)
+    print("------------------------------------------------------")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--grammar", default="./p1_grammar.cfg")
+    arg_parser.add_argument("--mode", choices=("random", "uniform", "enumerate"), default="random",
+                            help="random derivations, derivations drawn uniformly by length, "
+                                 "or all the sentences (default: random)")
+    arg_parser.add_argument("--count", type=int, default=None,
+                            help="number of unique sentences (default: %d, all of them for "
+                                 "--mode enumerate)" % NUMBER_OF_SENTENCES)
+    arg_parser.add_argument("--seed", type=int, default=None)
+    arg_parser.add_argument("--max-length", type=int, default=MAX_DEPTH,
+                            help="maximum number of words of a sentence")
+    arg_parser.add_argument("--length", type=int, default=None,
+                            help="exact number of words of the sentences, for --mode uniform "
+                                 "and enumerate")
+    arg_parser.add_argument("--max-attempts", type=int, default=None,
+                            help="maximum number of derivations (default: max(%d, 10 * count))"
+                                 % INFINITE_LOOP_COUNT)
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="number of generating processes, 0 for one per CPU")
+    arg_parser.add_argument("--counts", action="store_true",
+                            help="print the number of derivations of each length and exit")
+    arg_parser.add_argument("--output", default="output/samples.txt")
+    args = arg_parser.parse_args()
+
+    grammar = load_grammar(args.grammar).grammar
+    lengths = range(args.max_length + 1) if args.length is None else [args.length]
+    if args.counts:
+        enumerator = SentenceEnumerator(grammar, max(lengths))
+        for length in lengths:
+            print(length, enumerator.count(length))
+        return
+    if args.mode == "random" and isinstance(grammar, FeatureGrammar):
+        arg_parser.error("--mode random needs a plain CFG, use --mode uniform")
+
+    seed = random.randrange(2 ** 32) if args.seed is None else args.seed
+    count = args.count
+    if count is None and args.mode != "enumerate":
+        count = NUMBER_OF_SENTENCES
+    max_attempts = args.max_attempts or max(INFINITE_LOOP_COUNT, 10 * (count or 0))
+    workers = args.workers or os.cpu_count() or 1
 
-            if sentence not in generated_sentences:
-                generated_sentences.append(sentence)
+    if args.mode == "enumerate":
+        sentences = enumerate_sentences(grammar, lengths, count)
+    elif args.mode == "uniform":
+        sentences = sample_sentences(grammar, lengths, count, seed, max_attempts)
+    else:
+        sentences = generate_sentences(grammar, count, seed, args.max_length, max_attempts, workers)
+    written = write_sentences(sentences, args.output)
+    print("Count", written, "seed", seed)
+    if args.mode != "enumerate" and written < count:
+        print("Only %d unique sentences in %d derivations" % (written, max_attempts), file=sys.stderr)
 
-        print("Count", len(generated_sentences))
 
-        print_to_file(generated_sentences, "output/samples.txt")
-        print("------------------------------------------------------")
-    except RecursionError:
-        print("Please RUN again! RecursionError: maximum recursion depth exceeded.")
+if __name__ == '__main__':
+    main()
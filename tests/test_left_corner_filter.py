@@ -0,0 +1,31 @@
+import unittest
+
+from nltk.grammar import FeatureGrammar
+
+from custom_parser import Parser
+
+EMPTY_GRAMMAR = """
+% start S
+S -> E B
+E ->
+B -> 'b'
+"""
+
+
+class LeftCornerFilterTest(unittest.TestCase):
+
+    def test_empty_production(self):
+        grammar = FeatureGrammar.fromstring(EMPTY_GRAMMAR)
+        trees = list(Parser(grammar).parse_all(['b']))
+        self.assertEqual(len(trees), 1)
+        filtered = list(Parser(grammar, left_corner_filter=True).parse_all(['b']))
+        self.assertEqual([str(tree) for tree in filtered], [str(tree) for tree in trees])
+
+    def test_incremental_empty_production(self):
+        grammar = FeatureGrammar.fromstring(EMPTY_GRAMMAR)
+        incremental = Parser(grammar, left_corner_filter=True).incremental_parse()
+        self.assertEqual(incremental.push('b'), (True, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from parse_cache import AnswerCache
+
+
+class AnswerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "answers.sqlite")
+
+    def test_get_while_another_connection_writes(self):
+        cache = AnswerCache(self.path, touch_interval=0.0, timeout=5.0)
+        key = cache.key("grammar", "database", ["tour"])
+        cache.put(key, {"status": "ok"})
+
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            start = time.perf_counter()
+            self.assertEqual(cache.get(key), {"status": "ok"})
+            self.assertLess(time.perf_counter() - start, 1.0)
+        finally:
+            writer.execute("ROLLBACK")
+        self.assertEqual((cache.hits, cache.misses, cache.errors), (1, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from query_plan import QueryPlanner
+from tests.test_tour_database import load_facts
+from tour_database import TourDatabase
+
+
+def context(question, topic=None, _from=None, to=None):
+    return {"From": _from, "To": to, "Topic": topic, "Question": question}
+
+
+class QueryPlannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database = TourDatabase(load_facts())
+        self.planner = QueryPlanner()
+
+    def test_vehicle_without_destination(self):
+        for _ in range(2):
+            self.assertRaises(KeyError, self.planner.answer, self.database,
+                              context("What", "vehicle"))
+        [plan] = self.planner.plans()
+        self.assertEqual(plan.index, "none")
+        self.assertEqual(plan.histogram.count, 2)
+
+    def test_plans_call_the_database(self):
+        self.assertEqual(self.planner.answer(self.database, context("What", "vehicle", to="NT")),
+                         "train")
+        self.assertEqual(self.planner.answer(self.database, context("How_many", "tour", to="PQ")), 2)
+        self.assertEqual(self.planner.answer(self.database, context("What", "date", to="NT")),
+                         ["1/7", "5/7"])
+        self.assertEqual(self.planner.answer(self.database, context("How_long", _from="HCMC", to="DN")),
+                         ["2:00 HR"])
+        self.assertEqual([plan.index for plan in self.planner.plans()], ["tour", "to", "to", "route"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import unittest
+
+from hcmut.iaslab.nlp.app.service import QAService
+
+
+async def request(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(("%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n"
+                  "Connection: close\r\n\r\n" % (method, target, len(body))).encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body.decode("utf-8"))
+
+
+class QAServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = QAService(workers=0)
+        self.server = await asyncio.start_server(self.service.serve_connection, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+
+    async def test_answer(self):
+        body = json.dumps({"question": "đi Nha Trang có những ngày nào nhỉ"}).encode("utf-8")
+        status, answer = await request(self.port, "POST", "/answer", body)
+        self.assertEqual(status, 200)
+        self.assertEqual(answer["status"], "ok")
+        self.assertEqual(answer["result"], ["1/7", "5/7"])
+
+    async def test_errors(self):
+        status, response = await request(self.port, "POST", "/answer", b"not json")
+        self.assertEqual(status, 400)
+        self.assertIn("error", response)
+        status, response = await request(self.port, "GET", "/missing")
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
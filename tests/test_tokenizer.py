@@ -0,0 +1,30 @@
+import unittest
+
+from tokenizer import Tokenizer
+from utils import split_tokens
+
+TERMINALS = ['Hồ_Chí_Minh', 'Nha_Trang', 'có_thể', 'bao_lâu', 'đi', 'từ', 'tới', 'hết']
+
+
+class TokenizerTest(unittest.TestCase):
+
+    def test_longest_match(self):
+        tokenizer = Tokenizer(TERMINALS)
+        self.assertEqual(tokenizer.tokenize('đi từ Hồ Chí Minh tới Nha Trang hết bao lâu'),
+                         ['đi', 'từ', 'Hồ_Chí_Minh', 'tới', 'Nha_Trang', 'hết', 'bao_lâu'])
+
+    def test_underscores_separate_words(self):
+        tokenizer = Tokenizer(TERMINALS)
+        self.assertEqual(tokenizer.tokenize('em có_thể đi Nha_Trang'),
+                         ['em', 'có_thể', 'đi', 'Nha_Trang'])
+        self.assertEqual(tokenizer.tokenize_spans('có_thể đi'),
+                         [('có_thể', 0, 6), ('đi', 7, 9)])
+
+    def test_split_tokens(self):
+        accepted = ['Nha Trang', 'có thể', 'bao lâu']
+        self.assertEqual(split_tokens('có_thể đi Nha Trang hết bao lâu', accepted),
+                         ['có thể', 'đi', 'Nha Trang', 'hết', 'bao lâu'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from hcmut.iaslab.nlp.app.answerer import DATABASE_PATH, STATUS_NOT_SUITED, QuestionAnswerer
+from tour_database import TourDatabase, read_facts
+
+
+def load_facts():
+    with open(DATABASE_PATH, "r", encoding="utf-8") as file:
+        return read_facts(file.read())
+
+
+class TourDatabaseTest(unittest.TestCase):
+
+    def test_tour_facts_without_tour(self):
+        database = TourDatabase(load_facts())
+        self.assertEqual(database.tour_facts("BY", None), [])
+        self.assertRaises(KeyError, database.vehicle, None)
+        self.assertEqual(database.vehicle("NT"), "train")
+
+    def test_tour_with_several_origins(self):
+        database = TourDatabase(load_facts() + read_facts(
+            '(DTIME PQ DN "6AM 2/7") (ATIME PQ PQ "8AM 2/7")'))
+        self.assertEqual(database.count_departures("HCMC", "PQ"), 2)
+        self.assertEqual(database.departure_dates("HCMC", "PQ"), ["1/7", "5/7"])
+        self.assertEqual(database.departure_dates("DN", None), ["2/7"])
+        self.assertEqual(database.count_departures(None, "PQ"), 3)
+        self.assertEqual(database.tours("DN", None), ["PQ"])
+        self.assertEqual(database.run_times("DN", "PQ"), ["2:00 HR"])
+        self.assertEqual(database.arrivals(None, "PQ"), [
+            {"HCMC-PQ": "9AM 1/7"}, {"HCMC-PQ": "10AM 5/7"}, {"DN-PQ": "8AM 2/7"},
+        ])
+
+
+class QuestionAnswererTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.qa = QuestionAnswerer()
+
+    def test_vehicle_without_destination(self):
+        answer = self.qa.answer("tour đi bằng phương tiện gì vậy")
+        self.assertEqual(answer["status"], STATUS_NOT_SUITED)
+        self.assertIsNone(answer["result"])
+
+    def test_vehicle(self):
+        answer = self.qa.answer("tour Nha Trang đi bằng phương tiện gì vậy")
+        self.assertEqual(answer["result"], "train")
+
+
+if __name__ == '__main__':
+    unittest.main()
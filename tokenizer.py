@@ -0,0 +1,74 @@
+import re
+
+from nltk import CFG
+
+# Underscores separate words like spaces: "có_thể" is "có thể"
+_WORD = re.compile(r"[^\s_]+")
+
+
+def get_all_terminal_nodes(grammar: CFG):
+    nodes = []
+    for prod in grammar.productions():
+        for node in list(prod.rhs()):
+            if isinstance(node, str):
+                nodes.append(node)
+    return nodes
+
+
+class Tokenizer:
+    """
+    Longest-match tokenizer for the multiword terminals of a grammar.
+
+    The terminals are stored once in a trie of words, ``'có thể'`` and
+    ``'có_thể'`` both being the words ``('có', 'thể')``, and underscores
+    separate the words of sentences too. A sentence is then
+    tokenized in one left to right pass: at each word, the longest
+    terminal starting there is taken, and a word which starts no terminal
+    is a token by itself. Tokens are the terminals as written in the
+    grammar, so that they can be parsed directly.
+    """
+
+    def __init__(self, terminals):
+        # word -> child node, the terminal ending at a node is under None
+        self._trie = {}
+        for terminal in terminals:
+            words = terminal.replace("_", " ").split()
+            if not words:
+                continue
+            node = self._trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[None] = terminal
+
+    @classmethod
+    def from_grammar(cls, grammar):
+        return cls(get_all_terminal_nodes(grammar))
+
+    def tokenize_spans(self, sentence):
+        """
+        Return the tokens of ``sentence`` as ``(token, start, end)``
+        tuples, ``start`` and ``end`` being character offsets.
+        """
+        words = [(match.group(), match.start(), match.end()) for match in _WORD.finditer(sentence)]
+        spans = []
+        idx = 0
+        while idx < len(words):
+            node = self._trie
+            match, match_end = None, idx
+            pos = idx
+            while pos < len(words) and words[pos][0] in node:
+                node = node[words[pos][0]]
+                pos += 1
+                if None in node:
+                    match, match_end = node[None], pos
+            if match is None:
+                word, start, end = words[idx]
+                spans.append((word, start, end))
+                idx += 1
+            else:
+                spans.append((match, words[idx][1], words[match_end - 1][2]))
+                idx = match_end
+        return spans
+
+    def tokenize(self, sentence):
+        return [token for (token, _, _) in self.tokenize_spans(sentence)]
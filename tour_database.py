@@ -0,0 +1,181 @@
+import re
+
+# "(...)" groups, "..." strings, or atoms
+_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def read_facts(text):
+    """
+    Return the facts of an s-expression database such as database.txt,
+    as tuples of strings: ``(DTIME PQ HCMC "7AM 1/7")`` gives
+    ``('DTIME', 'PQ', 'HCMC', '7AM 1/7')``.
+    """
+    facts = []
+    fact = None
+    for token in _TOKEN.findall(text):
+        if token == "(":
+            if fact is not None:
+                raise ValueError("Nested fact in database: %r" % (fact,))
+            fact = []
+        elif token == ")":
+            if fact is None:
+                raise ValueError("Unbalanced ')' in database")
+            facts.append(tuple(fact))
+            fact = None
+        elif fact is None:
+            raise ValueError("Value outside of a fact in database: %r" % token)
+        else:
+            fact.append(token[1:-1] if token.startswith('"') else token)
+    if fact is not None:
+        raise ValueError("Unbalanced '(' in database")
+    return facts
+
+
+class TourDatabase:
+    """
+    The tours of database.txt, with hash indexes for the questions of
+    main.py. A tour is identified by its destination, and each of its
+    departures has its own route (departure place, destination). The
+    relations are:
+
+    - ``(TOUR tour name)``
+    - ``(DTIME tour from time)``: departure of the tour from ``from``
+    - ``(ATIME tour to time)``: arrival of the tour at ``to``; its route is
+      that of the departure of the tour on the same date
+    - ``(RUN-TIME tour from to duration)``: the places of RUN-TIME facts
+      are not consistent in database.txt, the routes of the tour's
+      departures are used instead
+    - ``(BY tour vehicle)``
+
+    ``None`` in a (from, to) lookup matches any place.
+    """
+
+    def __init__(self, facts):
+        # relation -> facts
+        self._by_relation = {}
+        # (relation, tour) -> facts
+        self._by_tour = {}
+        # DTIME and ATIME facts, by (relation, from, to), (relation, from)
+        # and (relation, to)
+        self._by_route = {}
+        self._by_from = {}
+        self._by_to = {}
+        # (tour, date) -> first DTIME fact of the tour on that date
+        self._by_date = {}
+        # DTIME or ATIME fact -> (from, to)
+        self._fact_routes = {}
+
+        for fact in facts:
+            relation, tour = fact[0], fact[1]
+            self._by_relation.setdefault(relation, []).append(fact)
+            self._by_tour.setdefault((relation, tour), []).append(fact)
+            if relation == "DTIME":
+                self._by_date.setdefault((tour, fact[3].split()[1]), fact)
+
+        for fact in self.facts("DTIME") + self.facts("ATIME"):
+            _from, to = self._fact_routes[fact] = self.fact_route(fact)
+            self._by_route.setdefault((fact[0], _from, to), []).append(fact)
+            self._by_from.setdefault((fact[0], _from), []).append(fact)
+            self._by_to.setdefault((fact[0], to), []).append(fact)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(read_facts(file.read()))
+
+    def facts(self, relation):
+        """
+        Return all the facts of ``relation``.
+        """
+        return self._by_relation.get(relation, [])
+
+    def tour_facts(self, relation, tour):
+        """
+        Return the facts of ``relation`` about ``tour``, none if ``tour``
+        is None.
+        """
+        return self._by_tour.get((relation, tour), [])
+
+    def fact_route(self, fact):
+        """
+        Return the (from, to) of a DTIME or ATIME fact. The origin of an
+        arrival is None if the tour has no departure on its date.
+        """
+        if fact[0] == "DTIME":
+            return fact[2], fact[1]
+        departure = self._by_date.get((fact[1], fact[3].split()[1]))
+        return (departure[2] if departure is not None else None), fact[2]
+
+    def route_facts(self, relation, _from=None, to=None):
+        """
+        Return the DTIME or ATIME facts of ``relation`` from ``_from`` to
+        ``to``.
+        """
+        if _from is not None and to is not None:
+            return self._by_route.get((relation, _from, to), [])
+        if _from is not None:
+            return self._by_from.get((relation, _from), [])
+        if to is not None:
+            return self._by_to.get((relation, to), [])
+        return self.facts(relation)
+
+    def tours(self, _from=None, to=None):
+        """
+        Return the tours with departures from ``_from`` to ``to``.
+        """
+        tours = []
+        for fact in self.route_facts("DTIME", _from, to):
+            if fact[1] not in tours:
+                tours.append(fact[1])
+        return tours
+
+    # ////////////////////////////////////////////////////////////
+    # Questions
+    # ////////////////////////////////////////////////////////////
+
+    def run_times(self, _from=None, to=None):
+        """
+        How long: the durations of the tours from ``_from`` to ``to``.
+        """
+        return [
+            " ".join(fact[4:])
+            for tour in self.tours(_from, to)
+            for fact in self.tour_facts("RUN-TIME", tour)
+        ]
+
+    def departures(self, _from=None, to=None):
+        """
+        The departure times from ``_from`` to ``to``.
+        """
+        return [fact[3] for fact in self.route_facts("DTIME", _from, to)]
+
+    def count_departures(self, _from=None, to=None):
+        """
+        How many: the number of departures from ``_from`` to ``to``.
+        """
+        return len(self.route_facts("DTIME", _from, to))
+
+    def departure_dates(self, _from=None, to=None):
+        """
+        What date: the dates of the departures from ``_from`` to ``to``.
+        """
+        return [time.split()[1] for time in self.departures(_from, to)]
+
+    def vehicle(self, to):
+        """
+        What vehicle: the vehicle of the tour to ``to``.
+        """
+        facts = self.tour_facts("BY", to)
+        if not facts:
+            raise KeyError("No vehicle for the tour to %r" % (to,))
+        return facts[0][2]
+
+    def arrivals(self, _from=None, to=None):
+        """
+        What: the arrival times from ``_from`` to ``to``, as
+        ``{"FROM-TO": time}``.
+        """
+        return [
+            {"%s-%s" % self._fact_routes[fact]: fact[3]}
+            for fact in self.route_facts("ATIME", _from, to)
+        ]
@@ -1,4 +1,8 @@
-from nltk import CFG
+from functools import lru_cache
+
+from nltk import Tree, TYPE
+
+from tokenizer import Tokenizer, get_all_terminal_nodes
 
 
 def context_filter(sems):
@@ -22,25 +26,26 @@ def context_filter(sems):
     return context
 
 
-def cv_query(text):
-    return text if text is not None else ".*"
-
-
-def get_all_terminal_nodes(grammar: CFG):
-    nodes = []
-    for prod in grammar.productions():
-        for node in list(prod.rhs()):
-            if isinstance(node, str):
-                nodes.append(node)
-    return nodes
-
-
 def split_tokens(sentence: str, accepted_tokens):
-    for tok in accepted_tokens:
-        sentence = sentence.replace(tok, "_".join(tok.split()))
-
-    tokens = sentence.split()
-    for idx, tok in enumerate(tokens):
-        tokens[idx] = " ".join(tok.split("_"))
-
-    return tokens
+    """
+    Split ``sentence`` into the longest ``accepted_tokens``.
+    """
+    return _tokenizer(tuple(accepted_tokens)).tokenize(sentence)
+
+
+@lru_cache(maxsize=16)
+def _tokenizer(accepted_tokens):
+    return Tokenizer(accepted_tokens)
+
+
+def strip_features(tree):
+    """
+    Return a copy of a tree parsed with a feature grammar, whose labels
+    are the category names instead of the feature structures.
+    """
+    if not isinstance(tree, Tree):
+        return tree
+    label = tree.label()
+    if isinstance(label, dict) and TYPE in label:
+        label = label[TYPE]
+    return Tree(label, [strip_features(child) for child in tree])